@@ -0,0 +1,54 @@
+import logging
+import os
+import sqlite3
+from datetime import timedelta
+
+from environment import *
+from .runcache import RunCache, CacheStats
+from .statestore import JsonStateStore
+from .verdictstore import VerdictStore
+
+## Stores created for the run, to be saved once at the end
+_state_stores: list[JsonStateStore | VerdictStore] = []
+
+
+def new_state_store(name: str) -> JsonStateStore:
+    """
+    Create a store persisted as `{STATE_DIR}/{name}.json`, saved by `save_state_stores`.
+    """
+    store = JsonStateStore(os.path.join(STATE_DIR, f"{name}.json"), timedelta(days=STATE_MAX_AGE_DAYS))
+    _state_stores.append(store)
+    return store
+
+
+def new_verdict_store(ttl: timedelta) -> VerdictStore:
+    """
+    Create a verdict store persisted as `{STATE_DIR}/verdicts.sqlite3`, saved by `save_state_stores`.
+    """
+    store = VerdictStore(os.path.join(STATE_DIR, "verdicts.sqlite3"), ttl, timedelta(days=STATE_MAX_AGE_DAYS))
+    _state_stores.append(store)
+    return store
+
+
+def save_state_stores() -> None:
+    for store in _state_stores:
+        try:
+            store.save()
+        except (OSError, sqlite3.Error) as e:
+            ## Not fatal, the next run starts cold
+            logging.warning(f"Failed to save state {store.path}: {e}")
+
+
+## Define what gets exported when using "from cache import *"
+__all__ = [
+    # Cache
+    'RunCache',
+    'new_state_store',
+    'new_verdict_store',
+    'save_state_stores',
+
+    # Core Models
+    'CacheStats',
+    'JsonStateStore',
+    'VerdictStore',
+]
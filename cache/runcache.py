@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+#### Model ####
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # concurrent misses served by another caller's in-flight load
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses, {self.coalesced} coalesced"
+
+
+#### Cache ####
+
+class RunCache(Generic[K, V]):
+    """
+    In-memory cache for the lifetime of a run, with single-flight loading:
+    concurrent callers missing on the same key share one load.
+    Failed loads are not cached.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = CacheStats()
+        self._values: dict[K, V] = {}
+        self._in_flight: dict[K, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: K, loader: Callable[[], V], is_valid: Optional[Callable[[V], bool]] = None) -> V:
+        """
+        :param is_valid: optional check of a cached value, a stale one is loaded again
+        """
+        with self._lock:
+            if key in self._values and (is_valid is None or is_valid(self._values[key])):
+                self.stats.hits += 1
+                return self._values[key]
+
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._values[key] = value
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return key in self._values
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            return self._values.get(key)
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def __str__(self):
+        return f"{self.name} cache: {self.stats}"
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+
+#### Store ####
+
+class JsonStateStore:
+    """
+    Key-value state kept between runs as one JSON file (e.g. restored by the GH Actions cache).
+    Loaded on first use and written back by `save`; entries not touched for `max_age` are dropped on save.
+    """
+
+    def __init__(self, path: str, max_age: timedelta):
+        self.path = path
+        self.max_age = max_age
+        self._entries: Optional[dict[str, dict]] = None
+        self._is_dirty = False
+        self._lock = threading.Lock()
+
+    def __load(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                ## A broken state only costs a cold run
+                logging.warning(f"Ignoring unreadable state file {self.path}: {e}")
+        return self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self.__load().get(key)
+            if entry is None:
+                return None
+
+            entry['touched_at'] = time.time()
+            self._is_dirty = True
+            return entry['value']
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.__load()[key] = {'value': value, 'touched_at': time.time()}
+            self._is_dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._is_dirty:
+                return
+
+            expired_before = time.time() - self.max_age.total_seconds()
+            entries = {key: entry for key, entry in self._entries.items() if entry['touched_at'] >= expired_before}
+
+            ## Write aside then swap, so an interrupted run never leaves a truncated file
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+
+            self._entries = entries
+            self._is_dirty = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self.__load())
+
+    def __str__(self):
+        return f"{self.path} ({len(self)} entries)"
@@ -0,0 +1,96 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from .runcache import CacheStats
+
+
+#### Store ####
+
+class VerdictStore:
+    """
+    Verdicts of the checks per ticket, kept between runs in SQLite.
+    A verdict is reusable while the ticket is unchanged (same `updated` and fingerprint) and younger than `ttl`.
+    """
+
+    def __init__(self, path: str, ttl: timedelta, max_age: timedelta):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.stats = CacheStats()  # hits: verdicts reused, misses: tickets checked again
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def __connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            try:
+                self._connection = self.__open()
+            except sqlite3.DatabaseError as e:
+                ## A broken state only costs a cold run
+                logging.warning(f"Discarding unreadable verdict store {self.path}: {e}")
+                os.remove(self.path)
+                self._connection = self.__open()
+        return self._connection
+
+    def __open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    check_name TEXT NOT NULL,
+                    ticket_key TEXT NOT NULL,
+                    updated TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    verdict TEXT NOT NULL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (check_name, ticket_key)
+                )
+            """)
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def get(self, check_name: str, ticket_key: str, updated: str, fingerprint: str) -> Optional[str]:
+        """
+        :return: the reusable verdict of the ticket, None if it has to be checked again
+        """
+        with self._lock:
+            row = self.__connect().execute(
+                "SELECT verdict FROM verdicts"
+                " WHERE check_name = ? AND ticket_key = ? AND updated = ? AND fingerprint = ? AND checked_at > ?",
+                (check_name, ticket_key, updated, fingerprint, time.time() - self.ttl.total_seconds())
+            ).fetchone()
+
+            if row:
+                self.stats.hits += 1
+                return row[0]
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, check_name: str, ticket_key: str, updated: str, fingerprint: str, verdict: str) -> None:
+        with self._lock:
+            self.__connect().execute(
+                "INSERT OR REPLACE INTO verdicts (check_name, ticket_key, updated, fingerprint, verdict, checked_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (check_name, ticket_key, updated, fingerprint, verdict, time.time())
+            )
+
+    def save(self) -> None:
+        with self._lock:
+            if self._connection is None:
+                return
+
+            self._connection.execute(
+                "DELETE FROM verdicts WHERE checked_at < ?", (time.time() - self.max_age.total_seconds(),)
+            )
+            self._connection.commit()
+
+    def __str__(self):
+        return f"{self.path}: {self.stats}"
@@ -8,6 +8,16 @@ JIRA_PROJECT_KEY = os.getenv('JIRA_PROJECT_KEY')
 
 ## GH config
 GITHUB_TOKEN = os.getenv('CUSTOM_GITHUB_TOKEN')
+GITHUB_GRAPHQL_BATCH_SIZE: int = int(os.getenv('GITHUB_GRAPHQL_BATCH_SIZE', '50'))  # PRs per GraphQL request
+GITHUB_CONDITIONAL_REQUESTS: bool = (os.getenv('GITHUB_CONDITIONAL_REQUESTS', 'true').lower()
+                                     in ('true', '1', 'yes'))  # ETag / Last-Modified revalidation of PRs
+GITHUB_RATE_LIMIT_RESERVE: int = int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '100'))  # requests kept, lookups deferred
+
+## State config, kept between runs
+STATE_DIR: str = os.getenv('STATE_DIR', '.jira_checker_state')
+STATE_MAX_AGE_DAYS: int = int(os.getenv('STATE_MAX_AGE_DAYS', '30'))  # entries unused for longer are dropped
+CONFLUENCE_PAGE_TTL_HOURS: float = float(os.getenv('CONFLUENCE_PAGE_TTL_HOURS', '24'))  # before a page is fetched again
+CONFLUENCE_MISSING_PAGE_TTL_HOURS: float = float(os.getenv('CONFLUENCE_MISSING_PAGE_TTL_HOURS', '6'))  # 404 / 403 pages
 
 ## Flow config
 FALLBACK: str = ''
@@ -17,8 +27,32 @@ JIRA_SHOULD_CHECK_DEPLOYMENT_NOTE: bool = (os.getenv('JIRA_SHOULD_CHECK_DEPLOYME
 JIRA_SHOULD_CHECK_LINKED_DEPENDENCY: bool = (os.getenv('JIRA_SHOULD_CHECK_LINKED_DEPENDENCY', FALLBACKS[1]).lower()
                                              in ('true', '1', 'yes'))
 JIRA_SHOULD_CHECK_GITHUB: bool = (os.getenv('JIRA_SHOULD_CHECK_GITHUB', FALLBACKS[2]).lower() in ('true', '1', 'yes'))
+JIRA_SHARED_SNAPSHOT: bool = (os.getenv('JIRA_SHARED_SNAPSHOT', 'true').lower()
+                              in ('true', '1', 'yes'))  # one search for all the enabled checks
+JIRA_RUN_CHECKS_CONCURRENTLY: bool = (os.getenv('JIRA_RUN_CHECKS_CONCURRENTLY', FALLBACK).lower()
+                                      in ('true', '1', 'yes'))
+JIRA_CHECK_WORKERS: int = int(os.getenv('JIRA_CHECK_WORKERS', '1'))  # tickets processed concurrently per check
+JIRA_SEARCH_SLICES: int = int(os.getenv('JIRA_SEARCH_SLICES', '1'))  # concurrent `updated` sub-ranges per search
+JIRA_GRAPHQL_BATCH_SIZE: int = int(os.getenv('JIRA_GRAPHQL_BATCH_SIZE', '20'))  # issues per GraphQL request
+JIRA_INCREMENTAL: bool = os.getenv('JIRA_INCREMENTAL', FALLBACK).lower() in ('true', '1', 'yes')
+JIRA_INCREMENTAL_OVERLAP_HOURS: float = float(os.getenv('JIRA_INCREMENTAL_OVERLAP_HOURS', '2'))  # re-scanned margin
+JIRA_VERDICT_TTL_HOURS: float = float(os.getenv('JIRA_VERDICT_TTL_HOURS', '0'))  # passing verdicts reused, 0 to disable
+CONFLUENCE_PAGE_WORKERS: int = int(os.getenv('CONFLUENCE_PAGE_WORKERS', '4'))  # pages fetched concurrently, across tickets
 LOGGER_LEVEL = logging.getLevelNamesMapping()[os.getenv('LOGGER_LEVEL', 'INFO').upper()]
 
+## HTTP config
+HTTP_POOL_CONNECTIONS: int = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))  # hosts to keep a pool for
+HTTP_POOL_MAXSIZE: int = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))  # connections per host
+HTTP_POOL_BLOCK: bool = os.getenv('HTTP_POOL_BLOCK', FALLBACK).lower() in ('true', '1', 'yes')
+HTTP_KEEP_ALIVE: bool = os.getenv('HTTP_KEEP_ALIVE', 'true').lower() in ('true', '1', 'yes')
+HTTP_CONNECT_TIMEOUT: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))  # seconds
+HTTP_READ_TIMEOUT: float = float(os.getenv('HTTP_READ_TIMEOUT', '30'))  # seconds
+HTTP_MAX_RETRIES: int = int(os.getenv('HTTP_MAX_RETRIES', '3'))  # per request
+HTTP_RETRY_BUDGET: int = int(os.getenv('HTTP_RETRY_BUDGET', '50'))  # per run, across all requests
+HTTP_BACKOFF_BASE: float = float(os.getenv('HTTP_BACKOFF_BASE', '1'))  # seconds
+HTTP_BACKOFF_MAX: float = float(os.getenv('HTTP_BACKOFF_MAX', '30'))  # seconds
+HTTP_RETRY_MAX_WAIT: float = float(os.getenv('HTTP_RETRY_MAX_WAIT', '60'))  # seconds, for Retry-After / reset
+
 #### Export ####
 __all__ = [
     'JIRA_TOKEN',
@@ -28,7 +62,36 @@ __all__ = [
     'JIRA_SHOULD_CHECK_DEPLOYMENT_NOTE',
     'JIRA_SHOULD_CHECK_LINKED_DEPENDENCY',
     'JIRA_SHOULD_CHECK_GITHUB',
+    'JIRA_SHARED_SNAPSHOT',
+    'JIRA_RUN_CHECKS_CONCURRENTLY',
+    'JIRA_CHECK_WORKERS',
+    'JIRA_SEARCH_SLICES',
+    'JIRA_GRAPHQL_BATCH_SIZE',
+    'JIRA_INCREMENTAL',
+    'JIRA_INCREMENTAL_OVERLAP_HOURS',
+    'JIRA_VERDICT_TTL_HOURS',
+    'CONFLUENCE_PAGE_WORKERS',
     'LOGGER_LEVEL',
 
-    'GITHUB_TOKEN'
+    'HTTP_POOL_CONNECTIONS',
+    'HTTP_POOL_MAXSIZE',
+    'HTTP_POOL_BLOCK',
+    'HTTP_KEEP_ALIVE',
+    'HTTP_CONNECT_TIMEOUT',
+    'HTTP_READ_TIMEOUT',
+    'HTTP_MAX_RETRIES',
+    'HTTP_RETRY_BUDGET',
+    'HTTP_BACKOFF_BASE',
+    'HTTP_BACKOFF_MAX',
+    'HTTP_RETRY_MAX_WAIT',
+
+    'GITHUB_TOKEN',
+    'GITHUB_GRAPHQL_BATCH_SIZE',
+    'GITHUB_CONDITIONAL_REQUESTS',
+    'GITHUB_RATE_LIMIT_RESERVE',
+
+    'STATE_DIR',
+    'STATE_MAX_AGE_DAYS',
+    'CONFLUENCE_PAGE_TTL_HOURS',
+    'CONFLUENCE_MISSING_PAGE_TTL_HOURS',
 ]
@@ -4,3 +4,18 @@ class UnexpectedException(Exception):
     def __init__(self, message="Expected error occurred"):
         self.message = message
         super().__init__(self.message)
+
+
+class RateLimitDeferredException(Exception):
+    """Raised when a lookup is deferred to keep the remaining rate limit budget."""
+
+    def __init__(self, message="Deferred due to low rate limit budget"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TransitionNotFoundException(UnexpectedException):
+    """Raised when the target state is not among the transitions of a ticket."""
+
+    def __init__(self, message="Target state not found"):
+        super().__init__(message)
@@ -1,10 +1,16 @@
+from cache import new_state_store
 from environment import *
+from network import new_session
 from . import githubmodel
 
 from .githubclient import GitHubClient
 
 ## Initialize the gh client with environment configuration
-github_client = GitHubClient(GITHUB_TOKEN)
+github_client = GitHubClient(
+    GITHUB_TOKEN,
+    new_session(),
+    new_state_store("github_etags") if GITHUB_CONDITIONAL_REQUESTS else None
+)
 
 ## Define what gets exported when using "from github import *"
 __all__ = [
@@ -1,14 +1,32 @@
-import requests
+import logging
+import threading
+from typing import Iterable, Optional
 
+from cache import CacheStats, JsonStateStore
+from network import PooledSession
 from .githubmodel import GitHubPullRequest
+from .ratelimit import RateLimitTracker
+
+#### Constants ####
+
+PULL_REQUEST_STATE_FIELDS = "number state mergedAt title headRefName"
 
 
 #### Client ####
 
 class GitHubClient:
 
-    def __init__(self, gh_token):
+    def __init__(self, gh_token, session: PooledSession, etag_store: Optional[JsonStateStore] = None):
+        """
+        :param etag_store: if given, PRs are revalidated with `If-None-Match` / `If-Modified-Since` against it,
+        a `304 Not Modified` does not count against the rate limit
+        """
         self.gh_token = gh_token
+        self.session = session
+        self.etag_store = etag_store
+        self.etag_stats = CacheStats()  # hits: 304 replayed, misses: full responses
+        self._etag_stats_lock = threading.Lock()
+        self.rate_limits = RateLimitTracker()  # updated from every response
 
     def __create_header(self) -> dict[str, str]:
         return {
@@ -17,9 +35,109 @@ class GitHubClient:
         }
 
     def fetch_pr(self, owner: str, repo: str, pr_number: int) -> GitHubPullRequest:
-        url = f'https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}'
+        url = self.__pr_url(owner, repo, pr_number)
+
+        headers = self.__create_header()
+        cached = self.etag_store.get(url) if self.etag_store else None
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.session.get(url, headers=headers)
+        self.rate_limits.update(response.headers)
+        if cached and response.status_code == 304:
+            self.__record_etag(is_hit=True)
+            return GitHubPullRequest.from_dict(cached['pr'])
+
+        response.raise_for_status()
+        pr = GitHubPullRequest.from_dict(response.json())
+
+        if self.etag_store is not None:
+            self.__record_etag(is_hit=False)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.etag_store.put(url, {'etag': etag, 'last_modified': last_modified, 'pr': pr.to_dict()})
+
+        return pr
+
+    def can_revalidate_pr(self, owner: str, repo: str, pr_number: int) -> bool:
+        """
+        :return: whether `fetch_pr` would send a conditional request for the PR, stored from an earlier response
+        """
+        return self.etag_store is not None and self.etag_store.get(self.__pr_url(owner, repo, pr_number)) is not None
+
+    def remaining_budget(self, resource: str = 'core') -> Optional[int]:
+        """
+        :return: requests left in the rate limit window of `resource` (core: REST, graphql: GraphQL points),
+        None if not known yet
+        """
+        return self.rate_limits.remaining(resource)
 
-        response = requests.get(url, headers=self.__create_header())
+    @staticmethod
+    def __pr_url(owner: str, repo: str, pr_number: int) -> str:
+        return f'https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}'
+
+    def __record_etag(self, is_hit: bool) -> None:
+        with self._etag_stats_lock:
+            if is_hit:
+                self.etag_stats.hits += 1
+            else:
+                self.etag_stats.misses += 1
+
+    def invoke_graphql(self, query: str, variables: dict) -> dict:
+        url = 'https://api.github.com/graphql'
+
+        response = self.session.post(url, headers=self.__create_header(), json={'query': query, 'variables': variables},
+                                     idempotent=True)
+        self.rate_limits.update(response.headers, default_resource='graphql')
         response.raise_for_status()
-        data = response.json()
-        return GitHubPullRequest.from_dict(data)
+        return response.json()
+
+    def fetch_prs(self,
+                  pr_refs: Iterable[tuple[str, str, int]],
+                  batch_size: int = 50
+                  ) -> dict[tuple[str, str, int], GitHubPullRequest]:
+        """
+        Bulk `fetch_pr` through GraphQL, with one aliased `repository.pullRequest` selection per PR.
+        Only `state`, `merged_at`, `title` and `head.ref` are populated.
+
+        :param pr_refs: (owner, repo, pr_number)
+        :return: (owner, repo, pr_number) -> PR; PRs which failed to resolve are left out and logged
+        """
+        result: dict[tuple[str, str, int], GitHubPullRequest] = {}
+        unique_refs = list(dict.fromkeys((owner, repo, int(pr_number)) for owner, repo, pr_number in pr_refs))
+        for start in range(0, len(unique_refs), batch_size):
+            chunk = unique_refs[start:start + batch_size]
+
+            variable_defs = []
+            selections = []
+            variables = {}
+            for i, (owner, repo, pr_number) in enumerate(chunk):
+                variable_defs.append(f"$owner{i}: String!, $repo{i}: String!, $number{i}: Int!")
+                selections.append(
+                    f"pr{i}: repository(owner: $owner{i}, name: $repo{i}) "
+                    f"{{ pullRequest(number: $number{i}) {{ {PULL_REQUEST_STATE_FIELDS} }} }}\n"
+                )
+                variables.update({f"owner{i}": owner, f"repo{i}": repo, f"number{i}": pr_number})
+            query = f"query PullRequestStates({', '.join(variable_defs)}) {{\n{''.join(selections)}}}"
+
+            response = self.invoke_graphql(query, variables)
+            data = response.get('data') or {}
+
+            failed_aliases = {
+                error['path'][0]: error.get('message')
+                for error in response.get('errors') or [] if error.get('path')
+            }
+            for i, pr_ref in enumerate(chunk):
+                alias = f"pr{i}"
+                pr_data = (data.get(alias) or {}).get('pullRequest')
+                if alias in failed_aliases or not pr_data:
+                    logging.warning(f"Failed to fetch GitHub PR {pr_ref}: {failed_aliases.get(alias, 'no data')}")
+                    continue
+
+                result[pr_ref] = GitHubPullRequest.from_graphql(pr_data)
+
+        return result
@@ -29,6 +29,16 @@ class GitHubUser:
             site_admin=data.get('site_admin', False)
         )
 
+    def to_dict(self) -> dict:
+        return {
+            'login': self.login,
+            'id': self.id,
+            'avatar_url': self.avatar_url,
+            'html_url': self.html_url,
+            'type': self.type,
+            'site_admin': self.site_admin
+        }
+
 
 # Model for GitHub PR head
 class GitHubPullRequestHead:
@@ -41,6 +51,9 @@ class GitHubPullRequestHead:
             ref=data.get('ref')
         )
 
+    def to_dict(self) -> dict:
+        return {'ref': self.ref}
+
 
 # Model for GitHub Pull Request
 class GitHubPullRequest:
@@ -81,3 +94,37 @@ class GitHubPullRequest:
             assignees=assignees,
             head=head
         )
+
+    def to_dict(self) -> dict:
+        """
+        The subset of the REST payload read by `from_dict`
+        """
+        return {
+            'id': self.id,
+            'number': self.number,
+            'title': self.title,
+            'body': self.body,
+            'user': self.user.to_dict(),
+            'state': self.state,
+            'merged_at': self.merged_at,
+            'assignees': [assignee.to_dict() for assignee in self.assignees],
+            'head': self.head.to_dict()
+        }
+
+    @staticmethod
+    def from_graphql(data: dict):
+        """
+        From a GraphQL `PullRequest` selection of `number state mergedAt title headRefName`
+        """
+        state = data.get('state')
+        return GitHubPullRequest(
+            id=None,
+            number=data.get('number'),
+            title=data.get('title'),
+            body=None,
+            user=GitHubUser.from_dict({}),
+            state=state.lower() if state == 'OPEN' else 'closed' if state else None,  # MERGED / CLOSED
+            merged_at=data.get('mergedAt'),
+            assignees=[],
+            head=GitHubPullRequestHead(ref=data.get('headRefName'))
+        )
@@ -0,0 +1,72 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+
+#### Model ####
+
+@dataclass
+class RateLimit:
+    resource: str  # e.g. core, graphql
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None  # epoch seconds
+
+    def __str__(self):
+        reset_in = max(0, int(self.reset_at - time.time())) if self.reset_at else None
+        return f"{self.resource}: {self.remaining}/{self.limit} remaining, resets in {reset_in}s"
+
+
+#### Tracker ####
+
+class RateLimitTracker:
+    """
+    Latest `X-RateLimit-*` state per GitHub resource, as seen on responses.
+    """
+
+    def __init__(self):
+        self._limits: dict[str, RateLimit] = {}
+        self._lock = threading.Lock()
+
+    def update(self, headers: Mapping[str, str], default_resource: str = 'core') -> None:
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+
+        resource = headers.get('X-RateLimit-Resource') or default_resource
+        limit = headers.get('X-RateLimit-Limit')
+        reset_at = headers.get('X-RateLimit-Reset')
+        try:
+            rate_limit = RateLimit(
+                resource=resource,
+                limit=int(limit) if limit else None,
+                remaining=int(remaining),
+                reset_at=float(reset_at) if reset_at else None
+            )
+        except ValueError:
+            return
+
+        with self._lock:
+            self._limits[resource] = rate_limit
+
+    def get(self, resource: str = 'core') -> Optional[RateLimit]:
+        with self._lock:
+            return self._limits.get(resource)
+
+    def remaining(self, resource: str = 'core') -> Optional[int]:
+        """
+        :return: requests left until the reset, None if not known yet or already reset
+        """
+        rate_limit = self.get(resource)
+        if not rate_limit or (rate_limit.reset_at and rate_limit.reset_at <= time.time()):
+            return None
+        return rate_limit.remaining
+
+    def is_low(self, resource: str, reserve: int) -> bool:
+        remaining = self.remaining(resource)
+        return remaining is not None and remaining <= reserve
+
+    def __str__(self):
+        with self._lock:
+            return "; ".join(str(rate_limit) for rate_limit in self._limits.values()) or "not seen"
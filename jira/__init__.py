@@ -1,10 +1,21 @@
+from datetime import timedelta
+
+from cache import new_state_store
 from environment import *
+from network import new_session
 from . import dev_summary_panel_model
 from . import jiramodel
 from .jiraclient import JiraClient
 
 ## Initialize the JIRA client with environment configuration
-jira_client = JiraClient(JIRA_DOMAIN, JIRA_TOKEN)
+jira_client = JiraClient(
+    JIRA_DOMAIN,
+    JIRA_TOKEN,
+    new_session(),
+    new_state_store("confluence_pages"),
+    page_ttl=timedelta(hours=CONFLUENCE_PAGE_TTL_HOURS),
+    missing_page_ttl=timedelta(hours=CONFLUENCE_MISSING_PAGE_TTL_HOURS)
+)
 
 ## Define what gets exported when using "from jira import *"
 __all__ = [
@@ -1,20 +1,153 @@
+import copy
 import logging
-from dataclasses import is_dataclass, asdict
-from typing import Mapping, cast
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import is_dataclass, asdict, replace
+from datetime import timezone
+from typing import Iterable, Iterator, Mapping, cast
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import requests
 
+from cache import CacheStats, JsonStateStore, RunCache
+from network import PooledSession
 from .dev_summary_panel_model import *
 from .jiramodel import *
 
 
+#### Constants ####
+
+DEV_SUMMARY_PANEL_OPERATION = 'DevSummaryPanelOneClickUrls'
+
+## Named selection sets of `developmentInformation`, pick the smallest one a caller reads
+DEV_SUMMARY_PANEL_PROFILES = {
+    'full': """
+        details {
+            instanceTypes {
+                id
+                type
+                devStatusErrorMessages
+                repository {
+                    avatarUrl
+                    name
+                    branches {
+                        createPullRequestUrl
+                        name
+                        url
+                    }
+                    commits {
+                        url
+                    }
+                    pullRequests {
+                        url
+                        status
+                    }
+                }
+                danglingPullRequests {
+                    url
+                    status
+                }
+                buildProviders {
+                    id
+                    builds {
+                        url
+                        state
+                    }
+                }
+            }
+        }
+    """,
+    'pr-status-only': """
+        details {
+            instanceTypes {
+                type
+                repository {
+                    pullRequests {
+                        url
+                        status
+                    }
+                }
+                danglingPullRequests {
+                    url
+                    status
+                }
+            }
+        }
+    """,
+}
+
+
+#### utils ####
+
+def issue_query(fields: Optional[List[str]], expand: Optional[List[str]]) -> dict[str, str]:
+    query = {}
+    if fields:
+        query['fields'] = ",".join(fields)
+    if expand:
+        query['expand'] = ",".join(expand)
+    return query
+
+
+def build_dev_summary_query(profile: str, aliases: Optional[List[str]] = None) -> tuple[str, str]:
+    """
+    Build the `developmentInformation` query with the selection set of `profile`.
+
+    :param aliases: one aliased selection per alias, each taking the issue id from the variable of the same name;
+        a single `issueId` selection if not given
+    :return: operation name and query
+    """
+    if profile not in DEV_SUMMARY_PANEL_PROFILES:
+        raise ValueError(f"Unknown development information profile: {profile}")
+
+    selection = DEV_SUMMARY_PANEL_PROFILES[profile]
+    if not aliases:
+        operation_name = DEV_SUMMARY_PANEL_OPERATION
+        query = f"""
+            query {operation_name}($issueId: ID!) {{
+                developmentInformation(issueId: $issueId) {{{selection}}}
+            }}
+        """
+        return operation_name, query
+
+    operation_name = f"{DEV_SUMMARY_PANEL_OPERATION}Batch"
+    variable_defs = ", ".join(f"${alias}: ID!" for alias in aliases)
+    selections = "".join(f"{alias}: developmentInformation(issueId: ${alias}) {{{selection}}}\n" for alias in aliases)
+    query = f"query {operation_name}({variable_defs}) {{\n{selections}}}"
+    return operation_name, query
+
+
 #### Client ####
 
 class JiraClient:
 
-    def __init__(self, jira_domain, jira_token):
+    def __init__(self,
+                 jira_domain,
+                 jira_token,
+                 session: PooledSession,
+                 page_store: Optional[JsonStateStore] = None,
+                 page_ttl: timedelta = timedelta(hours=24),
+                 missing_page_ttl: timedelta = timedelta(hours=6)
+                 ):
+        """
+        :param page_store: if given, Confluence pages (and pages not found / not permitted) are kept between runs,
+        for `page_ttl` (`missing_page_ttl` respectively)
+        """
         self.jira_domain = jira_domain
         self.jira_token = jira_token
+        self.session = session
+        self._myself: Optional[UserAccount] = None
+        self._myself_lock = threading.Lock()
+        self.issue_cache: RunCache[tuple, Issue] = RunCache("Issue")
+        self.page_cache: RunCache[str, Optional[ConfluencePage]] = RunCache("Confluence page")
+        self.remote_link_cache: RunCache[str, list[RemoteLink]] = RunCache("Remote link")
+        self.transitions_cache: RunCache[tuple, TransitionsResponse] = RunCache("Transitions")
+        self.page_store = page_store
+        self.page_store_stats = CacheStats()  # hits: served from the state of previous runs, fresh or same version
+        self._page_store_stats_lock = threading.Lock()
+        self.page_ttl = page_ttl
+        self.missing_page_ttl = missing_page_ttl
 
     def __create_header(self) -> dict[str, str]:
         """
@@ -28,45 +161,310 @@ class JiraClient:
 
     def fetch_search(self, params: SearchTicketsParams) -> SearchTicketsResponse:
         url = f'https://{self.jira_domain}/rest/api/3/search/jql'
-        response = requests.get(url, headers=self.__create_header(), params=vars(params))
+        response = self.session.get(url, headers=self.__create_header(), params=params.to_dict())
         response.raise_for_status()
         return SearchTicketsResponse.from_dict(response.json())
 
-    def fetch_issue(self, ticket_key: str) -> Issue:
+    def iter_search_pages(self, params: SearchTicketsParams, slices: int = 1) -> Iterator[SearchTicketsResponse]:
+        """
+        Lazily follow `nextPageToken` until the last page, one request per page consumed.
+
+        With `slices` > 1 and an `updated_window` on the params, the window is split into disjoint sub-ranges
+        which are paginated concurrently; pages are yielded as they arrive, deduplicated by issue key.
+        """
+        if params.updated_window and params.updated_window.now is None:
+            ## Resolved once, so that slices and pages requested at different times share the same bounds
+            params = params.anchored(self.jql_now())
+
+        if slices > 1 and params.updated_window:
+            windows = params.updated_window.split(slices)
+            if len(windows) > 1:
+                yield from self.__iter_sliced_pages([params.with_window(window) for window in windows])
+                return
+
+        page_params = copy.copy(params)
+        while True:
+            page = self.fetch_search(page_params)
+            yield page
+
+            if page.isLast or not page.nextPageToken or page.nextPageToken == page_params.nextPageToken:
+                return
+
+            page_params.nextPageToken = page.nextPageToken
+
+    def __iter_sliced_pages(self, sliced_params: list[SearchTicketsParams]) -> Iterator[SearchTicketsResponse]:
+        pages: queue.Queue = queue.Queue(maxsize=len(sliced_params) * 2)  # bounded, to keep memory flat
+        stopped = threading.Event()
+        slice_done = object()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_slice(slice_params: SearchTicketsParams) -> None:
+            try:
+                for slice_page in self.iter_search_pages(slice_params):
+                    if not put(slice_page):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(slice_done)
+
+        seen_keys: set[str] = set()
+        with ThreadPoolExecutor(max_workers=len(sliced_params), thread_name_prefix='jira-search') as executor:
+            for slice_params in sliced_params:
+                executor.submit(fetch_slice, slice_params)
+
+            remaining = len(sliced_params)
+            try:
+                while remaining:
+                    item = pages.get()
+                    if item is slice_done:
+                        remaining -= 1
+                        continue
+                    if isinstance(item, Exception):
+                        raise item
+
+                    issues = [issue for issue in item.issues if issue.key not in seen_keys]
+                    seen_keys.update(issue.key for issue in issues)
+                    yield replace(item, issues=issues)
+            finally:
+                stopped.set()
+
+    def iter_search(self, params: SearchTicketsParams, slices: int = 1) -> Iterator[Issue]:
+        for page in self.iter_search_pages(params, slices):
+            yield from page.issues
+
+    def fetch_issue(self,
+                    ticket_key: str,
+                    fields: Optional[List[str]] = None,
+                    expand: Optional[List[str]] = None
+                    ) -> Issue:
+        """
+        :param fields: only return these fields, like `SearchTicketsParams`; all fields if not given
+        :param expand: e.g. `renderedFields`, `names`
+        """
         url = f"https://{self.jira_domain}/rest/api/3/issue/{ticket_key}"
-        response = requests.get(url, headers=self.__create_header())
+        response = self.session.get(url, headers=self.__create_header(), params=issue_query(fields, expand))
         response.raise_for_status()
         return Issue.from_dict(response.json())
 
+    def get_issue(self,
+                  ticket_key: str,
+                  fields: Optional[List[str]] = None,
+                  expand: Optional[List[str]] = None,
+                  min_updated: Optional[datetime] = None
+                  ) -> Issue:
+        """
+        Cached `fetch_issue` for the run; concurrent callers of the same key and projection share one request.
+
+        :param min_updated: if given, a cached issue last updated before it is fetched again
+        """
+        if min_updated and fields and 'updated' not in fields:
+            fields = [*fields, 'updated']
+
+        def is_fresh(issue: Issue) -> bool:
+            updated = issue.updated_at()
+            return updated is not None and updated >= min_updated
+
+        return self.issue_cache.get_or_load(
+            (ticket_key, tuple(fields or ()), tuple(expand or ())),
+            lambda: self.fetch_issue(ticket_key, fields, expand),
+            is_fresh if min_updated else None
+        )
+
+    def get_issues(self,
+                   ticket_keys: Iterable[str],
+                   fields: Optional[List[str]] = None,
+                   chunk_size: int = 100
+                   ) -> dict[str, Issue]:
+        """
+        Bulk `get_issue`: uncached keys are resolved with a few `key in (...)` searches, and cached for the run.
+        Keys not returned by the search (e.g. moved issues) are left out, `get_issue` can still resolve them.
+        """
+        projection = tuple(fields or ())
+        result: dict[str, Issue] = {}
+        missing_keys: list[str] = []
+        for ticket_key in dict.fromkeys(ticket_keys):
+            cached = self.issue_cache.get((ticket_key, projection, ()))
+            if cached:
+                result[ticket_key] = cached
+            else:
+                missing_keys.append(ticket_key)
+
+        for start in range(0, len(missing_keys), chunk_size):
+            chunk = missing_keys[start:start + chunk_size]
+            params = SearchTicketsParams(
+                jql=f'key IN ({", ".join(chunk)})',
+                fields=fields or ["*all"],
+                max_results=chunk_size
+            )
+            for issue in self.iter_search(params):
+                self.issue_cache.put((issue.key, projection, ()), issue)
+                result[issue.key] = issue
+
+        return result
+
+    def get_cached_issue(self, ticket_key: str, fields: Optional[List[str]] = None) -> Optional[Issue]:
+        """
+        The issue as cached for the run by `get_issue` / `get_issues` with the same projection, without fetching it.
+        """
+        return self.issue_cache.get((ticket_key, tuple(fields or ()), ()))
+
     def fetch_remote_link(self, ticket_key: str) -> list[RemoteLink]:
         url = f"https://{self.jira_domain}/rest/api/3/issue/{ticket_key}/remotelink"
-        response = requests.get(url, headers=self.__create_header())
+        response = self.session.get(url, headers=self.__create_header())
         response.raise_for_status()
         data = response.json()
         return [RemoteLink.from_dict(item) for item in data]
 
-    def fetch_confluence_content(self, page_id: str) -> Optional[ConfluencePage]:
-        url = f"https://{self.jira_domain}/wiki/api/v2/pages/{page_id}"
+    def get_remote_links(self, ticket_key: str) -> list[RemoteLink]:
+        """
+        Cached `fetch_remote_link` for the run.
+        """
+        return self.remote_link_cache.get_or_load(ticket_key, lambda: self.fetch_remote_link(ticket_key))
+
+    def get_confluence_page(self, page_id: str) -> Optional[ConfluencePage]:
+        """
+        Fetched at most once per run, and kept between runs if a page store is given.
+        Pages not found or not permitted are cached as None; other failures are logged and not cached.
+        """
         try:
-            response = requests.get(url, headers=self.__create_header())
-            response.raise_for_status()
-            return ConfluencePage.from_dict(response.json())
+            return self.page_cache.get_or_load(page_id, lambda: self.__load_confluence_page(page_id))
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching Confluence content for page {page_id}: {e}")
             return None
 
+    def get_confluence_pages(self, page_ids: Iterable[str], chunk_size: int = 250) -> dict[str, Optional[ConfluencePage]]:
+        """
+        Bulk `get_confluence_page`: pages neither cached for the run nor kept from previous runs are listed with
+        a few `GET /wiki/api/v2/pages?id=...` requests. Pages left out of the listing (not found / not permitted)
+        are cached as None. A kept page past its TTL whose listed version is unchanged is kept as it is.
+
+        :param chunk_size: page ids per request, up to 250
+        """
+        unique_ids = list(dict.fromkeys(page_ids))
+        missing_ids = []
+        for page_id in unique_ids:
+            if page_id in self.page_cache:
+                continue
+
+            is_fresh, page = self.__read_stored_confluence_page(page_id)
+            if is_fresh:
+                self.page_cache.put(page_id, page)
+            else:
+                missing_ids.append(page_id)
+
+        url = f"https://{self.jira_domain}/wiki/api/v2/pages"
+        for start in range(0, len(missing_ids), chunk_size):
+            chunk = missing_ids[start:start + chunk_size]
+            params = {'id': ','.join(chunk), 'limit': len(chunk)}
+
+            response = self.session.get(url, headers=self.__create_header(), params=params)
+            response.raise_for_status()
+            pages = {page.id: page for page in map(ConfluencePage.from_dict, response.json().get('results', []))}
+
+            for page_id in chunk:
+                page = self.__revalidate_stored_confluence_page(page_id, pages.get(page_id))
+                self.page_cache.put(page_id, page)
+
+        return {page_id: self.page_cache.get(page_id) for page_id in unique_ids}
+
+    def __load_confluence_page(self, page_id: str) -> Optional[ConfluencePage]:
+        is_fresh, page = self.__read_stored_confluence_page(page_id)
+        if is_fresh:
+            return page
+
+        url = f"https://{self.jira_domain}/wiki/api/v2/pages/{page_id}"
+        response = self.session.get(url, headers=self.__create_header())
+
+        if response.status_code in (403, 404):
+            logging.error(f"Error fetching Confluence content for page {page_id}: {response.status_code} {response.reason}")
+            self.__keep_confluence_page(page_id, None, response.status_code)
+            return None
+
+        response.raise_for_status()
+        page = ConfluencePage.from_dict(response.json())
+        self.__keep_confluence_page(page_id, page, None)
+        return page
+
+    def __read_stored_confluence_page(self, page_id: str) -> tuple[bool, Optional[ConfluencePage]]:
+        """
+        :return: whether the page store holds a fresh entry, and its page (None if not found / not permitted)
+        """
+        stored = self.page_store.get(page_id) if self.page_store else None
+        if not stored:
+            return False, None
+
+        ttl = self.page_ttl if stored.get('page') else self.missing_page_ttl
+        if time.time() - stored['fetched_at'] >= ttl.total_seconds():
+            return False, None
+
+        with self._page_store_stats_lock:
+            self.page_store_stats.hits += 1
+        return True, ConfluencePage.from_dict(stored['page']) if stored.get('page') else None
+
+    def __revalidate_stored_confluence_page(self,
+                                            page_id: str,
+                                            listed: Optional[ConfluencePage]
+                                            ) -> Optional[ConfluencePage]:
+        """
+        Compare the listed version of a page with the one kept from previous runs; keep the stored page
+        for another TTL if unchanged, replace it otherwise.
+        """
+        stored = self.page_store.get(page_id) if self.page_store else None
+        stored_page = ConfluencePage.from_dict(stored['page']) if stored and stored.get('page') else None
+        if not listed or not stored_page or not listed.version or stored_page.version != listed.version:
+            if stored_page:
+                logging.debug(f"Confluence page {page_id} changed since version {stored_page.version}")
+            self.__keep_confluence_page(page_id, listed, None if listed else 404)
+            return listed
+
+        with self._page_store_stats_lock:
+            self.page_store_stats.hits += 1
+        self.page_store.put(page_id, {**stored, 'fetched_at': time.time()})
+        return stored_page
+
+    def __keep_confluence_page(self, page_id: str, page: Optional[ConfluencePage], status: Optional[int]) -> None:
+        if self.page_store is None:
+            return
+
+        with self._page_store_stats_lock:
+            self.page_store_stats.misses += 1
+        self.page_store.put(page_id, {
+            'page': page.to_dict() if page else None,
+            'status': status,
+            'fetched_at': time.time()
+        })
+
     def update_ticket_fields(self, ticket_key: str, payload: dict) -> None:
         url = f"https://{self.jira_domain}/rest/api/3/issue/{ticket_key}"
-        response = requests.put(url, headers=self.__create_header(), json=payload)
+        response = self.session.put(url, headers=self.__create_header(), json=payload)
         response.raise_for_status()
 
     def fetch_transitions(self, ticket_key: str) -> TransitionsResponse:
         """Fetch available transitions for a ticket, type-safe."""
         url = f"https://{self.jira_domain}/rest/api/3/issue/{ticket_key}/transitions"
-        response = requests.get(url, headers=self.__create_header())
+        response = self.session.get(url, headers=self.__create_header())
         response.raise_for_status()
         return TransitionsResponse.from_dict(response.json())
 
+    def get_transitions(self, ticket_key: str, workflow_state: Optional[tuple] = None) -> TransitionsResponse:
+        """
+        Cached `fetch_transitions` for the run, shared by the tickets in the same `workflow_state`,
+        e.g. (project, issue type, status), which share the same transitions. Without one, always fetched.
+        """
+        if workflow_state is None:
+            return self.fetch_transitions(ticket_key)
+
+        return self.transitions_cache.get_or_load(workflow_state, lambda: self.fetch_transitions(ticket_key))
+
     def do_transition(
             self,
             ticket_key: str,
@@ -96,12 +494,12 @@ class JiraClient:
         if fields_dict:
             payload.update(fields_dict)
 
-        response = requests.post(url, headers=self.__create_header(), json=payload)
+        response = self.session.post(url, headers=self.__create_header(), json=payload, idempotent=False)
         response.raise_for_status()
 
     def fetch_comments(self, ticket_key: str) -> CommentsResponse:
         url = f"https://{self.jira_domain}/rest/api/3/issue/{ticket_key}/comment"
-        response = requests.get(url, headers=self.__create_header())
+        response = self.session.get(url, headers=self.__create_header())
         response.raise_for_status()
         return CommentsResponse.from_dict(response.json())
 
@@ -111,63 +509,51 @@ class JiraClient:
             "body": comment,
             "visibility": None  ## null
         }
-        response = requests.post(url, headers=self.__create_header(), json=payload)
+        response = self.session.post(url, headers=self.__create_header(), json=payload, idempotent=False)
         response.raise_for_status()
 
     def fetch_myself(self) -> UserAccount:
         url = f"https://{self.jira_domain}/rest/api/3/myself"
-        response = requests.get(url, headers=self.__create_header())
+        response = self.session.get(url, headers=self.__create_header())
         response.raise_for_status()
         return UserAccount.from_dict(response.json())
 
+    def get_myself(self) -> UserAccount:
+        """
+        The authenticated account, resolved once per process. See `refresh_myself`.
+        """
+        with self._myself_lock:
+            if self._myself is None:
+                self._myself = self.fetch_myself()
+            return self._myself
+
+    def refresh_myself(self) -> UserAccount:
+        with self._myself_lock:
+            self._myself = self.fetch_myself()
+            return self._myself
+
+    def jql_now(self) -> datetime:
+        """
+        Current time in the time zone of the authenticated account, in which JQL reads absolute dates.
+        """
+        time_zone = self.get_myself().time_zone
+        try:
+            return datetime.now(ZoneInfo(time_zone)) if time_zone else datetime.now(timezone.utc)
+        except (ZoneInfoNotFoundError, ValueError):
+            logging.warning(f"Unknown time zone '{time_zone}' of the JIRA account, using UTC")
+            return datetime.now(timezone.utc)
+
     def invoke_graphql(self, payload: GraphqlQueryParam) -> dict[str, Any]:
         url = f"https://{self.jira_domain}/jsw2/graphql"
-        response = requests.post(url, headers=self.__create_header(), json=payload.to_dict())
+        response = self.session.post(url, headers=self.__create_header(), json=payload.to_dict(), idempotent=True)
         response.raise_for_status()
         return response.json()
 
-    def get_dev_summary_panel_one_click_urls(self, issue_id: str) -> DevSummaryPanelResponse:
-        operation_name = 'DevSummaryPanelOneClickUrls'
-        query = """
-                query DevSummaryPanelOneClickUrls($issueId: ID!) {
-                    developmentInformation(issueId: $issueId) {
-                        details {
-                            instanceTypes {
-                                id
-                                type
-                                devStatusErrorMessages
-                                repository {
-                                    avatarUrl
-                                    name
-                                    branches {
-                                        createPullRequestUrl
-                                        name
-                                        url
-                                    }
-                                    commits {
-                                        url
-                                    }
-                                    pullRequests {
-                                        url
-                                        status
-                                    }
-                                }
-                                danglingPullRequests {
-                                    url
-                                    status
-                                }
-                                buildProviders {
-                                    id
-                                    builds {
-                                        url
-                                        state
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
+    def get_dev_summary_panel_one_click_urls(self, issue_id: str, profile: str = 'full') -> DevSummaryPanelResponse:
+        """
+        :param profile: selection set, see `DEV_SUMMARY_PANEL_PROFILES`
         """
+        operation_name, query = build_dev_summary_query(profile)
         variables = {
             "issueId": issue_id
         }
@@ -175,3 +561,38 @@ class JiraClient:
         payload = GraphqlQueryParam(operation_name, query, variables)
         response = self.invoke_graphql(payload)
         return DevSummaryPanelResponse.from_dict(response)
+
+    def get_dev_summary_panels(self,
+                               issue_ids: Iterable[str],
+                               batch_size: int = 20,
+                               profile: str = 'full'
+                               ) -> dict[str, DevSummaryPanelResponse]:
+        """
+        Batched `get_dev_summary_panel_one_click_urls`: one aliased `developmentInformation` selection per issue,
+        `batch_size` issues per GraphQL request.
+
+        :return: issue id -> response; issues whose selection failed are left out and logged
+        """
+        result: dict[str, DevSummaryPanelResponse] = {}
+        unique_ids = list(dict.fromkeys(issue_ids))
+        for start in range(0, len(unique_ids), batch_size):
+            chunk = unique_ids[start:start + batch_size]
+            aliases = {f"issue{i}": issue_id for i, issue_id in enumerate(chunk)}
+            operation_name, query = build_dev_summary_query(profile, list(aliases))
+
+            response = self.invoke_graphql(GraphqlQueryParam(operation_name, query, aliases))
+            data = response.get('data') or {}
+
+            failed_aliases = {
+                error['path'][0]: error.get('message')
+                for error in response.get('errors') or [] if error.get('path')
+            }
+            for alias, issue_id in aliases.items():
+                if alias in failed_aliases or not data.get(alias):
+                    logging.warning(f"Failed to fetch development information for issue {issue_id}: "
+                                    f"{failed_aliases.get(alias, 'no data')}")
+                    continue
+
+                result[issue_id] = DevSummaryPanelResponse.from_dict({'data': {'developmentInformation': data[alias]}})
+
+        return result
@@ -1,5 +1,6 @@
-from dataclasses import dataclass, field
-from datetime import datetime
+import copy
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 
 
@@ -21,6 +22,24 @@ def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
     raise ValueError(f'Unsupported datetime format: {value}')
 
 
+def _format_duration(value: timedelta) -> str:
+    """
+    Format as JQL relative duration, e.g. 5d, 12h, 90m
+    """
+    minutes = max(int(value.total_seconds() // 60), 0)
+    for unit, size in (('d', 24 * 60), ('h', 60)):
+        if minutes and minutes % size == 0:
+            return f'{minutes // size}{unit}'
+    return f'{minutes}m'
+
+
+def _format_jql_datetime(value: datetime) -> str:
+    """
+    Format as JQL absolute date, read by JIRA in the time zone of the searching account
+    """
+    return value.strftime('%Y/%m/%d %H:%M')
+
+
 #### Type ####
 @dataclass
 class Sprint:
@@ -151,6 +170,68 @@ class Issue:
             fields=fields
         )
 
+    def updated_at(self) -> Optional[datetime]:
+        """
+        Parsed `updated` field, if requested
+        """
+        return _parse_datetime(getattr(self.fields, 'updated', None)) if self.fields else None
+
+
+@dataclass
+class UpdatedWindow:
+    """
+    Relative `updated` range, e.g. since=5d, until=1d means `updated >= -5d and updated < -1d`.
+    `until` of zero leaves the range open-ended.
+    Once `anchored`, the bounds are absolute dates from `now`, the same for every request of a search.
+    """
+    since: timedelta
+    until: timedelta = timedelta(0)
+    now: Optional[datetime] = None
+
+    def anchored(self, now: datetime) -> 'UpdatedWindow':
+        """
+        Fix the bounds relative to `now`, to the minute. An anchored window keeps its anchor.
+        """
+        if self.now is not None:
+            return self
+        return replace(self, now=now.replace(second=0, microsecond=0))
+
+    def to_jql(self) -> str:
+        if self.now is None:
+            jql = f'updated >= -{_format_duration(self.since)}'
+            if self.until > timedelta(0):
+                jql += f' and updated < -{_format_duration(self.until)}'
+            return jql
+
+        jql = f'updated >= "{_format_jql_datetime(self.now - self.since)}"'
+        if self.until > timedelta(0):
+            jql += f' and updated < "{_format_jql_datetime(self.now - self.until)}"'
+        return jql
+
+    def contains(self, updated: Optional[datetime], now: datetime) -> bool:
+        """
+        Same as `to_jql` evaluated at `now` (the anchor if any), for tickets already fetched
+        """
+        now = self.now or now
+        if updated is None:
+            return False
+        if updated < now - self.since:
+            return False
+        return self.until <= timedelta(0) or updated < now - self.until
+
+    def split(self, slices: int) -> List['UpdatedWindow']:
+        """
+        Split into disjoint sub-ranges of (roughly) equal length, oldest first.
+        """
+        minutes = int((self.since - self.until).total_seconds() // 60)
+        slices = max(min(slices, minutes), 1)
+        if slices == 1:
+            return [self]
+
+        step = minutes // slices
+        bounds = [self.since - timedelta(minutes=step * i) for i in range(slices)] + [self.until]
+        return [UpdatedWindow(since=bounds[i], until=bounds[i + 1], now=self.now) for i in range(slices)]
+
 
 @dataclass
 class SearchTicketsParams:
@@ -158,12 +239,46 @@ class SearchTicketsParams:
     fields: str = field(init=False)
     maxResults: int = 200
     nextPageToken: Optional[str] = None
-
-    def __init__(self, jql: str, fields: List[str], max_results: int = 200, next_page_token: str = None):
+    updated_window: Optional[UpdatedWindow] = None
+
+    def __init__(self,
+                 jql: str,
+                 fields: List[str],
+                 max_results: int = 200,
+                 next_page_token: str = None,
+                 updated_window: Optional[UpdatedWindow] = None
+                 ):
         self.jql = jql
         self.fields = ",".join(fields)
         self.maxResults = max_results
         self.nextPageToken = next_page_token
+        self.updated_window = updated_window
+
+    def to_jql(self) -> str:
+        if not self.updated_window:
+            return self.jql
+        return f'{self.updated_window.to_jql()} and {self.jql}'
+
+    def with_window(self, updated_window: UpdatedWindow) -> 'SearchTicketsParams':
+        params = copy.copy(self)
+        params.updated_window = updated_window
+        return params
+
+    def anchored(self, now: datetime) -> 'SearchTicketsParams':
+        """
+        See `UpdatedWindow.anchored`
+        """
+        if not self.updated_window:
+            return self
+        return self.with_window(self.updated_window.anchored(now))
+
+    def to_dict(self) -> dict:
+        return {
+            'jql': self.to_jql(),
+            'fields': self.fields,
+            'maxResults': self.maxResults,
+            'nextPageToken': self.nextPageToken
+        }
 
 
 @dataclass
@@ -264,14 +379,23 @@ class ConfluencePageVersion:
 class ConfluencePage:
     title: str = ''
     id: str = ''
+    version: int = 0  # version number, bumped on each edit
 
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
             title=data.get('title', ''),
-            id=data.get('id', '')
+            id=data.get('id', ''),
+            version=(data.get('version') or {}).get('number', 0)
         )
 
+    def to_dict(self) -> dict:
+        return {
+            'title': self.title,
+            'id': self.id,
+            'version': {'number': self.version}
+        }
+
 
 @dataclass
 class TransitionStatus:
@@ -1,9 +1,18 @@
 import logging
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
 
+from cache import save_state_stores
 from environment import *
 from exception.exceptionmodel import UnexpectedException
-from script import check_for_deployment_note, check_for_linked_dependency, check_for_github
+from github import github_client
+from jira import jira_client
+from network import retry_budget
+from script import check_for_deployment_note, check_for_linked_dependency, check_for_github, \
+    deployment_note_query, linked_dependency_query, github_query, TicketSnapshot, fetch_snapshot
+from script.executor import grouped_map
+from script.verdicts import verdict_store
 
 ## Log config
 logging.basicConfig(
@@ -20,28 +29,43 @@ def main():
     logging.info(f"Starting JIRA checking script at {hkt} (HKT)...")
     logging.info("=================================================================================")
 
+    enabled_checks = [
+        (name, check, query) for name, check, query, is_enabled in (
+            ("Deployment Note", check_for_deployment_note, deployment_note_query, JIRA_SHOULD_CHECK_DEPLOYMENT_NOTE),
+            ("Linked Dependency", check_for_linked_dependency, linked_dependency_query,
+             JIRA_SHOULD_CHECK_LINKED_DEPENDENCY),
+            ("GitHub", check_for_github, github_query, JIRA_SHOULD_CHECK_GITHUB),
+        ) if is_enabled
+    ]
+    ## Run side by side with grouped output if asked; the deployment note and GitHub checks may both reopen
+    ## the same Done / Accepted ticket, so their actions on a ticket are serialized (see `acting_on`)
+    workers = len(enabled_checks) if JIRA_RUN_CHECKS_CONCURRENTLY else 1
+
     results = []
+    timings = []
+    snapshot_elapsed = None
+    started_at = time.monotonic()
 
     try:
-        if JIRA_SHOULD_CHECK_DEPLOYMENT_NOTE:
-            result = check_for_deployment_note()
-            results.append(result)
-            logging.info("=================================================================================")
-
-        if JIRA_SHOULD_CHECK_LINKED_DEPENDENCY:
-            result = check_for_linked_dependency()
-            results.append(result)
-            logging.info("=================================================================================")
+        ## One search for all the checks, each selecting its tickets from it
+        snapshot = None
+        if JIRA_SHARED_SNAPSHOT and len(enabled_checks) > 1:
+            snapshot = fetch_snapshot([query() for _, _, query in enabled_checks])
+            snapshot_elapsed = time.monotonic() - started_at
 
-        if JIRA_SHOULD_CHECK_GITHUB:
-            result = check_for_github()
+        checks = [(name, check, snapshot) for name, check, _ in enabled_checks]
+        for name, result, elapsed in grouped_map(run_check, checks, workers):
             results.append(result)
-            logging.info("=================================================================================")
+            timings.append((name, elapsed))
 
         logging.info("Done JIRA checking script!")
     except Exception as e:
         logging.error(f"Unexpected error during JIRA checking: {e}")
         raise e
+    finally:
+        print_timing_summary(timings, snapshot_elapsed, time.monotonic() - started_at)
+        print_run_stats()
+        save_state_stores()
 
     is_all_good = all(results)
     if not is_all_good:
@@ -49,5 +73,39 @@ def main():
         raise UnexpectedException("One or more checks failed. Please review the logs for details.")
 
 
+def run_check(named_check: tuple[str, Callable[[Optional[TicketSnapshot]], bool], Optional[TicketSnapshot]]
+              ) -> tuple[str, bool, float]:
+    name, check, snapshot = named_check
+    started_at = time.monotonic()
+
+    result = check(snapshot)
+    logging.info("=================================================================================")
+
+    return name, result, time.monotonic() - started_at
+
+
+def print_timing_summary(timings: list[tuple[str, float]], snapshot_elapsed: Optional[float], total_elapsed: float):
+    if snapshot_elapsed is not None:
+        logging.info("Shared snapshot took %.1fs", snapshot_elapsed)
+    for name, elapsed in timings:
+        logging.info("Check '%s' took %.1fs", name, elapsed)
+    logging.info("All checks took %.1fs (%s)", total_elapsed,
+                 "concurrently" if JIRA_RUN_CHECKS_CONCURRENTLY else "sequentially")
+
+
+def print_run_stats():
+    logging.info("HTTP connection pool (JIRA): %s", jira_client.session.connection_stats())
+    logging.info("HTTP connection pool (GitHub): %s", github_client.session.connection_stats())
+    logging.info("HTTP retries: %s", retry_budget)
+    logging.info("%s", jira_client.issue_cache)
+    if verdict_store is not None:
+        logging.info("Verdicts reused: %s", verdict_store)
+    if jira_client.page_store is not None:
+        logging.info("Confluence pages from previous runs: %s (%s)", jira_client.page_store_stats, jira_client.page_store)
+    logging.info("GitHub rate limits: %s", github_client.rate_limits)
+    if github_client.etag_store is not None:
+        logging.info("GitHub conditional requests: %s (%s)", github_client.etag_stats, github_client.etag_store)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,41 @@
+from environment import *
+from .pooledsession import PooledSession, ConnectionStats, create_pooled_session
+from .retry import RetryBudget, RetryPolicy
+
+## Retries are budgeted per run, across all sessions
+retry_budget = RetryBudget(HTTP_RETRY_BUDGET)
+
+
+def new_session() -> PooledSession:
+    """
+    Create a pooled session with environment configuration.
+    """
+    return create_pooled_session(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        keep_alive=HTTP_KEEP_ALIVE,
+        retry_policy=RetryPolicy(
+            budget=retry_budget,
+            max_retries=HTTP_MAX_RETRIES,
+            backoff_base=HTTP_BACKOFF_BASE,
+            backoff_max=HTTP_BACKOFF_MAX,
+            max_wait=HTTP_RETRY_MAX_WAIT
+        )
+    )
+
+
+## Define what gets exported when using "from network import *"
+__all__ = [
+    # Factory
+    'new_session',
+    'retry_budget',
+
+    # Core Models
+    'PooledSession',
+    'ConnectionStats',
+    'RetryBudget',
+    'RetryPolicy',
+]
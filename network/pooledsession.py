@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+
+from .retry import RetryPolicy, IDEMPOTENT_METHODS
+
+
+#### Model ####
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    def __str__(self):
+        return f"{self.requests} requests over {self.connections} connections ({self.reused} reused)"
+
+
+#### Adapter ####
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with a default timeout, which also counts requests sent and sockets opened,
+    so the connection reuse can be reported at the end of a run.
+    """
+
+    def __init__(self, timeout: tuple[float, Optional[float]], **kwargs):
+        self.timeout = timeout
+        self._stats = ConnectionStats()
+        self._stats_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self.__counting_pool(HTTPConnectionPool),
+            'https': self.__counting_pool(HTTPSConnectionPool)
+        }
+
+    def __counting_pool(self, pool_cls: type) -> type:
+        on_connect = self.__on_connect
+
+        class CountingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                on_connect()
+                super().connect()
+
+        class CountingPool(pool_cls):
+            ConnectionCls = CountingConnection
+
+        return CountingPool
+
+    def __on_connect(self) -> None:
+        with self._stats_lock:
+            self._stats.connections += 1
+
+    def send(self, request, timeout=None, **kwargs):
+        with self._stats_lock:
+            self._stats.requests += 1
+
+        return super().send(request, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+    def connection_stats(self) -> ConnectionStats:
+        with self._stats_lock:
+            return ConnectionStats(requests=self._stats.requests, connections=self._stats.connections)
+
+
+#### Session ####
+
+class PooledSession(requests.Session):
+    """
+    Keep-alive session with one bounded connection pool per host, retrying transient failures when a policy is given.
+    """
+
+    def __init__(self,
+                 pool_connections: int,
+                 pool_maxsize: int,
+                 pool_block: bool,
+                 timeout: tuple[float, Optional[float]],
+                 keep_alive: bool = True,
+                 retry_policy: Optional[RetryPolicy] = None
+                 ):
+        super().__init__()
+        self.adapter = PooledHTTPAdapter(
+            timeout=timeout,
+            pool_connections=pool_connections,  # number of hosts to keep pools for
+            pool_maxsize=pool_maxsize,  # connections kept per host
+            pool_block=pool_block
+        )
+        self.mount('https://', self.adapter)
+        self.mount('http://', self.adapter)
+        self.retry_policy = retry_policy
+
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+
+    def request(self, method, url, *args, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        :param idempotent: whether the request is safe to repeat; defaults by HTTP method,
+            pass explicitly for read-only POST (e.g. GraphQL queries)
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if not policy or not policy.should_retry_error(e, idempotent, attempt) \
+                        or not policy.budget.try_acquire():
+                    raise
+                delay = policy.backoff(attempt)
+                reason = type(e).__name__
+            else:
+                delay = policy.retry_delay(response, idempotent, attempt) if policy else None
+                if delay is None or not policy.budget.try_acquire():
+                    return response
+                response.close()
+                reason = response.status_code
+
+            attempt += 1
+            logging.warning(f"[HTTP] {method} {url} got {reason}, retrying in {delay:.1f}s "
+                            f"(attempt {attempt}/{policy.max_retries}, {policy.budget})")
+            time.sleep(delay)
+
+    def connection_stats(self) -> ConnectionStats:
+        return self.adapter.connection_stats()
+
+
+def create_pooled_session(pool_connections: int,
+                          pool_maxsize: int,
+                          pool_block: bool = False,
+                          connect_timeout: float = 5,
+                          read_timeout: Optional[float] = 30,
+                          keep_alive: bool = True,
+                          retry_policy: Optional[RetryPolicy] = None
+                          ) -> PooledSession:
+    return PooledSession(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        timeout=(connect_timeout, read_timeout),
+        keep_alive=keep_alive,
+        retry_policy=retry_policy
+    )
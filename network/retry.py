@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+#### Constants ####
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+#### Budget ####
+
+class RetryBudget:
+    """
+    Retries allowed for the whole run, shared by every session.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+    def __str__(self):
+        return f"{self.used}/{self.total} retries used"
+
+
+#### Policy ####
+
+class RetryPolicy:
+
+    def __init__(self,
+                 budget: RetryBudget,
+                 max_retries: int = 3,
+                 backoff_base: float = 1,
+                 backoff_max: float = 30,
+                 max_wait: float = 60
+                 ):
+        self.budget = budget
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base  # seconds
+        self.backoff_max = backoff_max  # seconds, cap of a computed backoff
+        self.max_wait = max_wait  # seconds, longest server-advised wait we are willing to honour
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def should_retry_error(self, error: requests.exceptions.RequestException, idempotent: bool, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+
+        ## A write may have reached the server unless the connection was never established
+        if not idempotent:
+            return isinstance(error, requests.exceptions.ConnectTimeout)
+
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def retry_delay(self, response: requests.Response, idempotent: bool, attempt: int) -> Optional[float]:
+        """
+        :return: seconds to wait before retrying, or None if the response should be returned as-is
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        is_rate_limited = response.status_code == 429 or (
+                response.status_code == 403 and response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+
+        ## A rate-limited write was rejected before processing; any other failed write is not safe to repeat
+        if not is_rate_limited and (not idempotent or response.status_code not in RETRYABLE_STATUS):
+            return None
+
+        advised = advised_delay(response)
+        if advised is None:
+            return self.backoff(attempt)
+
+        if advised > self.max_wait:
+            return None
+
+        ## Small jitter so that concurrent workers do not wake up at the same moment
+        return advised + random.uniform(0, self.backoff_base)
+
+
+#### utils ####
+
+def advised_delay(response: requests.Response) -> Optional[float]:
+    """
+    Seconds to wait as advised by `Retry-After`, or by `X-RateLimit-Reset` when no quota remains.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        delay = _parse_seconds_or_date(retry_after)
+        if delay is not None:
+            return delay
+
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset:
+            return _parse_reset(reset)
+
+    return None
+
+
+def _parse_seconds_or_date(value: str) -> Optional[float]:
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value: str) -> Optional[float]:
+    ## GitHub: epoch seconds; Atlassian: ISO 8601 timestamp
+    try:
+        return max(float(value) - time.time(), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() - time.time(), 0)
+    except ValueError:
+        return None
@@ -1,9 +1,17 @@
-from .check_deployment_note import check_for_deployment_note
-from .check_github import check_for_github
-from .check_linked_dependency import check_for_linked_dependency
+from .check_deployment_note import check_for_deployment_note, ticket_query as deployment_note_query
+from .check_github import check_for_github, ticket_query as github_query
+from .check_linked_dependency import check_for_linked_dependency, ticket_query as linked_dependency_query
+from .snapshot import TicketSnapshot, fetch_snapshot
 
 __all__ = [
     'check_for_deployment_note',
     'check_for_linked_dependency',
     'check_for_github',
+
+    # Shared snapshot
+    'deployment_note_query',
+    'linked_dependency_query',
+    'github_query',
+    'TicketSnapshot',
+    'fetch_snapshot',
 ]
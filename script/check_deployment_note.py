@@ -1,5 +1,9 @@
 import logging
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, Iterator
 
 import requests
 
@@ -8,17 +12,27 @@ from environment import *
 from exception.exceptionmodel import UnexpectedException
 from jira import *
 from jira.jiramodel import *
+from .executor import TicketOutcome, process_tickets, batched, ordered_map, first_match
+from .incremental import incremental_window, advance_watermark
+from .snapshot import TicketQuery, TicketSnapshot
 from .utils import print_conclusion, should_skip_by_label, should_skip_by_tailing_next_part, extract_assignee_id, \
-    perform_one_of_transitions, find_heading_ticket, determine_relationship
+    perform_one_of_transitions, find_heading_ticket, determine_relationship, has_status_in, is_in_project, \
+    acting_on, heading_ticket_fields
+from .verdicts import without_unchanged_passed, recording_verdicts
 
 ##
+check_name = "deployment_note"  # of the incremental watermark
 whitelisted_label = WHITELISTED_LABEL
 warning_label = "DeploymentNote"
+batch_size = 200  # same as a search page
+## Confluence pages of all tickets fetched side by side, bounded for the run
+page_executor = ThreadPoolExecutor(max_workers=CONFLUENCE_PAGE_WORKERS, thread_name_prefix='confluence-page') \
+    if CONFLUENCE_PAGE_WORKERS > 1 else None
 
 
 ####
 
-def check_for_deployment_note() -> bool:
+def check_for_deployment_note(snapshot: Optional[TicketSnapshot] = None) -> bool:
     """
     Step of checking:
     1. Sort-out potential target tickets
@@ -31,67 +45,106 @@ def check_for_deployment_note() -> bool:
 
     logging.info("Checking for Deployment Note... ⚠️")
 
-    tickets = fetch_tickets()
-    ticket_keys = [ticket.key for ticket in tickets]
-    logging.info("Found %d target ticket: %s", len(ticket_keys), ticket_keys)
+    started_at = snapshot.fetched_at if snapshot else time.time()
+    process = recording_verdicts(check_name, process_ticket)
+    tickets = snapshot.select(check_name) if snapshot else ticket_query().fetch()
+    tickets = with_confluence_pages_resolved(without_unchanged_passed(check_name, tickets))
+    bad_tickets, error_tickets, _ = process_tickets(tickets, process, JIRA_CHECK_WORKERS)
 
-    bad_tickets: list[str] = []
-    error_tickets: list[str] = []
+    print_conclusion(bad_tickets, error_tickets)
+    if len(error_tickets) == 0:
+        advance_watermark(check_name, started_at)
+    logging.info("%s", jira_client.page_cache)
+    return len(error_tickets) == 0
 
-    for ticket in tickets:
-        ticket_key = ticket.key
-        logging.info(f"[{ticket_key}] Processing ticket...")
 
-        try:
-            if should_skip_by_label(ticket, whitelisted_label):
-                logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
-                continue
+def process_ticket(ticket: Issue) -> TicketOutcome:
+    ticket_key = ticket.key
+    logging.info(f"[{ticket_key}] Processing ticket...")
 
-            if should_skip_by_tailing_next_part(ticket):
-                logging.info(f"[{ticket_key}] Skipping due to tailing 'Part N' cloned ticket...")
-                continue
+    try:
+        if should_skip_by_label(ticket, whitelisted_label):
+            logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
+            return TicketOutcome()
+
+        if should_skip_by_tailing_next_part(ticket):
+            logging.info(f"[{ticket_key}] Skipping due to tailing 'Part N' cloned ticket...")
+            return TicketOutcome()
+
+        if not nest_check(ticket, None):
+            ## Action
+            with acting_on(ticket) as is_status_current:
+                if not is_status_current:
+                    logging.info(f"[{ticket_key}] Skipping action as already transitioned by another check")
+                    return TicketOutcome(bad=ticket_key)
 
-            if not nest_check(ticket, None):
-                ## Action
                 remaining_quota = calculate_remaining_quota(ticket_key)
                 if should_do_transition(ticket_key, remaining_quota):
-                    do_transition(ticket_key)
+                    do_transition(ticket)
 
                 add_comment(ticket, remaining_quota)
 
-                bad_tickets.append(ticket_key)
-                continue
-        except (requests.exceptions.RequestException, UnexpectedException) as e:
-            logging.error(f"[{ticket_key}] Encountered {type(e).__name__}: {e.message}")
-            error_tickets.append(ticket_key)
-            continue
+            return TicketOutcome(bad=ticket_key)
+    except (requests.exceptions.RequestException, UnexpectedException) as e:
+        logging.error(f"[{ticket_key}] Encountered {type(e).__name__}: {e.message}")
+        return TicketOutcome(error=ticket_key)
 
-    print_conclusion(bad_tickets, error_tickets)
-    return len(error_tickets) == 0
+    return TicketOutcome()
 
 
 ####
 
-def fetch_tickets() -> list[Issue]:
+def ticket_query() -> TicketQuery:
     ## get the last week updated tickets with DeploymentNote label
     ### Done: Story, Debt
     ### Accepted: Incident, Bugs
     status_list = ['Done', 'Accepted']
-    time_range = "5d"  # e.g.: h,d,w
+    time_range = timedelta(days=5)
     project = JIRA_PROJECT_KEY
 
-    jql = f'updated >= -{time_range} and labels IN (DeploymentNote) and status IN ({", ".join(status_list)}) and project = {project}'
-    fields = ["assignee", "status", "labels", "issuelinks", "summary", "fixVersions"]
+    jql = f'labels IN (DeploymentNote) and status IN ({", ".join(status_list)}) and project = {project}'
+    fields = ["assignee", "status", "updated", "issuetype", "labels", "issuelinks", "summary", "fixVersions"]
 
     params = SearchTicketsParams(
         jql=jql,
         fields=fields,
+        updated_window=incremental_window(check_name, UpdatedWindow(since=time_range))
     )
 
-    logging.info("Fetching tickets with JQL: '%s'...", jql)
-    response: SearchTicketsResponse = jira_client.fetch_search(params)
+    def is_target(ticket: Issue) -> bool:
+        labels = getattr(ticket.fields, "labels", None) if ticket.fields else None
+        return (warning_label in (labels or [])
+                and has_status_in(ticket, status_list)
+                and is_in_project(ticket, project))
+
+    return TicketQuery(check_name, params, is_target)
+
+
+def with_confluence_pages_resolved(tickets: Iterable[Issue]) -> Iterator[Issue]:
+    """
+    Per batch of tickets, fetch the remote links of those to be checked and resolve all the Confluence pages they
+    mention in bulk, so that `is_valid` reads them from the cache instead of one request per page.
+    """
+    for batch in batched(tickets, batch_size):
+        target_keys = [
+            ticket.key
+            for ticket in batch
+            if not should_skip_by_label(ticket, whitelisted_label) and not should_skip_by_tailing_next_part(ticket)
+        ]
+
+        try:
+            page_ids = [
+                page_id
+                for remote_links in ordered_map(jira_client.get_remote_links, target_keys, JIRA_CHECK_WORKERS)
+                for page_id in extract_mentioned_page_ids(remote_links)
+            ]
+            if page_ids:
+                resolved = jira_client.get_confluence_pages(page_ids)
+                logging.info(f"Resolved {len(resolved)} Confluence pages for {len(target_keys)} tickets in bulk")
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Failed to resolve Confluence pages in bulk: {e}")
 
-    return response.issues
+        yield from batch
 
 
 def nest_check(ticket: Issue, linked_ticket_key: Optional[str]) -> bool:
@@ -113,14 +166,14 @@ def nest_check(ticket: Issue, linked_ticket_key: Optional[str]) -> bool:
         logging.info(
             f"[{determine_relationship(ticket_key, heading_key)}] Tracing for its heading ticket ({heading_key})..."
         )
-        heading_ticket = jira_client.fetch_issue(heading_key)
+        heading_ticket = jira_client.get_issue(heading_key, heading_ticket_fields)
         return nest_check(heading_ticket, ticket_key)
 
     return False
 
 
 def check(ticket: Issue) -> bool:
-    remote_links_response: list[RemoteLink] = jira_client.fetch_remote_link(ticket.key)
+    remote_links_response: list[RemoteLink] = jira_client.get_remote_links(ticket.key)
     return is_valid(remote_links_response, ticket)
 
 
@@ -141,31 +194,44 @@ def is_valid(remote_link_resp: list[RemoteLink], ticket: Issue) -> bool:
         logging.info(f"[{key}] No remote links found")
         return False
 
-    for remote_link in remote_link_resp:
+    def matched_page_id(page_id: str) -> Optional[str]:
+        content = jira_client.get_confluence_page(page_id)
+        if not content:
+            return None
+
+        version = extract_version(content.title)
+        if not version:
+            return None
+
+        return page_id if is_match_with_issue(version, ticket) else None
+
+    ## Pages not cached yet are fetched side by side, the first match in link order wins and the rest are cancelled
+    page_ids = extract_mentioned_page_ids(remote_link_resp)
+    page_id = first_match(matched_page_id, page_ids, page_executor, lambda page_id: page_id in jira_client.page_cache)
+    if page_id:
+        logging.info(f"[{key}] Found valid remote link for page_id: {page_id} ✅")
+        return True
+
+    logging.info(f"[{key}] No valid remote links found")
+    return False
+
+
+def extract_mentioned_page_ids(remote_links: list[RemoteLink]) -> list[str]:
+    """
+    Page ids of the "mentioned in" remote links, in order.
+    """
+    page_ids = []
+    for remote_link in remote_links:
         if remote_link.relationship == "mentioned in":
             url = remote_link.object.url
             if not url:
                 continue
 
             page_id = extract_page_id(url)
-            if not page_id:
-                continue
-
-            content = jira_client.fetch_confluence_content(page_id)
-            if not content:
-                continue
-
-            version = extract_version(content.title)
-            if not version:
-                continue
+            if page_id:
+                page_ids.append(page_id)
 
-            is_match = is_match_with_issue(version, ticket)
-            if is_match:
-                logging.info(f"[{key}] Found valid remote link for page_id: {page_id} ✅")
-                return True
-
-    logging.info(f"[{key}] No valid remote links found")
-    return False
+    return page_ids
 
 
 def extract_page_id(url: str) -> Optional[str]:
@@ -206,15 +272,15 @@ def is_match_with_issue(candidate: str, ticket: Issue) -> bool:
 
 
 ## TODO: move to util
-def do_transition(ticket_key: str) -> None:
+def do_transition(ticket: Issue) -> None:
     """
     Perform the transition to "Reopen" state for a given ticket.
-    :param ticket_key: Ticket in "Done" / "Accepted" status
+    :param ticket: Ticket in "Done" / "Accepted" status
     """
 
     ## Perform the transition once
     target_states = ["Reopen (CAT)", "Rework"]
-    perform_one_of_transitions(ticket_key, target_states)
+    perform_one_of_transitions(ticket, target_states)
 
 
 def add_comment(ticket: Issue, remaining_quota: int) -> None:
@@ -224,7 +290,7 @@ def add_comment(ticket: Issue, remaining_quota: int) -> None:
     """
 
     ticket_key = ticket.key
-    user = jira_client.fetch_myself().display_name or "JIRA"
+    user = jira_client.get_myself().display_name or "JIRA"
     assignee_id = extract_assignee_id(ticket)
 
     action = f"highlighted (quota before reopened: {remaining_quota})" if remaining_quota > 0 else "reopened"
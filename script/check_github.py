@@ -1,102 +1,205 @@
 import logging
 import re
+import time
+from datetime import timedelta
+from typing import Iterable, Iterator
 
 import requests
 
+from cache import RunCache
 from constants import *
 from environment import *
-from exception.exceptionmodel import UnexpectedException
+from exception.exceptionmodel import UnexpectedException, RateLimitDeferredException
 from github import github_client
+from github.githubmodel import GitHubPullRequest
 from jira import *
 from jira.dev_summary_panel_model import *
 from jira.jiramodel import *
+from .executor import TicketOutcome, process_tickets, batched
+from .incremental import incremental_window, advance_watermark
+from .snapshot import TicketQuery, TicketSnapshot
 from .utils import print_conclusion, should_skip_by_label, should_skip_by_tailing_next_part, extract_assignee_id, \
-    perform_transition, find_heading_ticket, determine_relationship
+    perform_transition, find_heading_ticket, determine_relationship, has_status_in, is_in_project, acting_on, \
+    is_custom_clone_summary, heading_ticket_fields
+from .verdicts import without_unchanged_passed, recording_verdicts
 
 ##
+check_name = "github"  # of the incremental watermark
 reviewer_field = REVIEWER_FIELD  # This is the field ID for the Reviewer field in JIRA
 whitelisted_label = WHITELISTED_LABEL
+batch_size = 200  # same as a search page
+dev_summary_profile = "pr-status-only"  # only PR urls and status are read
+
+## issue id -> development information, for the run
+dev_summary_cache: RunCache[str, DevSummaryPanelResponse] = RunCache("Development information")
+## Normalized (owner, repo, PR number) -> PR, for the run: each PR is resolved at GitHub once,
+## however many tickets link it. The ticket related check in `check_with_gh` still runs per ticket.
+pull_request_cache: RunCache[tuple[str, str, int], GitHubPullRequest] = RunCache("GitHub PR")
 
 
 ####
 
-def check_for_github() -> bool:
+def check_for_github(snapshot: Optional[TicketSnapshot] = None) -> bool:
     """
     Ride on Git plugin in JIRA to check if there is any open PR for the issue.
     """
     logging.info("Checking for open git pull request... ⚠️")
 
-    tickets = fetch_tickets()
-    ticket_keys = [ticket.key for ticket in tickets]
-    logging.info(f"Found {len(ticket_keys)} tickets: {ticket_keys}")
+    started_at = snapshot.fetched_at if snapshot else time.time()
+    process = recording_verdicts(check_name, process_ticket, pull_request_states)
+    tickets = snapshot.select(check_name) if snapshot else ticket_query().fetch()
+    ## Development information first, a passing verdict only holds for the same PRs
+    tickets = without_unchanged_passed(check_name, with_dev_summary_resolved(tickets), pull_request_states)
+    tickets = with_pull_requests_resolved(tickets)
+    bad_tickets, error_tickets, deferred_tickets = process_tickets(tickets, process, JIRA_CHECK_WORKERS)
+
+    print_conclusion(bad_tickets, error_tickets, deferred_tickets)
+    ## Deferred tickets have to stay in the window of the next run
+    if len(error_tickets) == 0 and len(deferred_tickets) == 0:
+        advance_watermark(check_name, started_at)
+    logging.info("%s", dev_summary_cache)
+    logging.info("%s", pull_request_cache)
+    return len(error_tickets) == 0
 
-    bad_tickets: list[str] = []
-    error_tickets: list[str] = []
 
-    for ticket in tickets:
-        ticket_key = ticket.key
-        issue_id = ticket.id
+def process_ticket(ticket: Issue) -> TicketOutcome:
+    ticket_key = ticket.key
+    issue_id = ticket.id
 
-        logging.info(f"[{ticket_key}] Processing ticket...")
+    logging.info(f"[{ticket_key}] Processing ticket...")
 
-        try:
-            if not issue_id:
-                logging.error(f"[{ticket_key}] Missing issue_id")
-                error_tickets.append(ticket_key)
-                continue
+    try:
+        if not issue_id:
+            logging.error(f"[{ticket_key}] Missing issue_id")
+            return TicketOutcome(error=ticket_key)
 
-            if should_skip_by_label(ticket, whitelisted_label):
-                logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
-                continue
+        if should_skip_by_label(ticket, whitelisted_label):
+            logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
+            return TicketOutcome()
 
-            if should_skip_by_tailing_next_part(ticket):
-                logging.info(f"[{ticket_key}] Skipping due to tailing 'Part N' cloned ticket...")
-                continue
+        if should_skip_by_tailing_next_part(ticket):
+            logging.info(f"[{ticket_key}] Skipping due to tailing 'Part N' cloned ticket...")
+            return TicketOutcome()
 
-            open_prs = nest_check_open_prs(ticket, None)
-            if not open_prs:
-                logging.info(f"[{ticket_key}] No open Pull Request found. All good ✅")
-                continue
+        open_prs = nest_check_open_prs(ticket, None)
+        if not open_prs:
+            logging.info(f"[{ticket_key}] No open Pull Request found. All good ✅")
+            return TicketOutcome()
 
-            logging.info(f"[{ticket_key}] Found {len(open_prs)} open pull requests ❌")
-            ## Action
-            do_transition(ticket_key)
+        logging.info(f"[{ticket_key}] Found {len(open_prs)} open pull requests ❌")
+        ## Action
+        with acting_on(ticket) as is_status_current:
+            if not is_status_current:
+                logging.info(f"[{ticket_key}] Skipping action as already transitioned by another check")
+                return TicketOutcome(bad=ticket_key)
+
+            do_transition(ticket)
             add_comment(ticket, open_prs)
 
-            bad_tickets.append(ticket_key)
+        return TicketOutcome(bad=ticket_key)
 
-        except (requests.exceptions.RequestException, UnexpectedException) as e:
-            logging.error(f"[{ticket_key}] Encountered {type(e).__name__}: {e.message}")
-            error_tickets.append(ticket_key)
-            continue
+    except RateLimitDeferredException as e:
+        ## Left to a later run rather than failing this one, the ticket stays in the search window
+        logging.warning(f"[{ticket_key}] {e.message}")
+        return TicketOutcome(deferred=ticket_key)
 
-    print_conclusion(bad_tickets, error_tickets)
-    return len(error_tickets) == 0
+    except (requests.exceptions.RequestException, UnexpectedException) as e:
+        logging.error(f"[{ticket_key}] Encountered {type(e).__name__}: {e.message}")
+        return TicketOutcome(error=ticket_key)
 
 
 ####
 
-def fetch_tickets() -> list[Issue]:
+def ticket_query() -> TicketQuery:
     ## get the last week updated tickets
     ### Done: Story, Debt
     ### Accepted: Incident, Bugs
     status_list = ['Done', 'Accepted']
-    time_range = "5d"  # e.g.: h,d,w
-    time_buffer = "1d"  # e.g.: h,d,w; for cache buffer on info
+    time_range = timedelta(days=5)
+    time_buffer = timedelta(days=1)  # for cache buffer on info
     project = JIRA_PROJECT_KEY
 
-    jql = f'updated >= -{time_range} and updated < -{time_buffer} and status IN ({", ".join(status_list)}) and project = {project}'
-    fields = ["assignee", "status", "labels", "issuelinks", "summary", reviewer_field]
+    jql = f'status IN ({", ".join(status_list)}) and project = {project}'
+    fields = ["assignee", "status", "updated", "issuetype", "labels", "issuelinks", "summary", reviewer_field]
 
     params = SearchTicketsParams(
         jql=jql,
         fields=fields,
+        updated_window=incremental_window(check_name, UpdatedWindow(since=time_range, until=time_buffer))
     )
 
-    logging.info("Fetching tickets with JQL: '%s'...", jql)
-    response: SearchTicketsResponse = jira_client.fetch_search(params)
+    def is_target(ticket: Issue) -> bool:
+        return has_status_in(ticket, status_list) and is_in_project(ticket, project)
+
+    return TicketQuery(check_name, params, is_target)
+
+
+def with_dev_summary_resolved(tickets: Iterable[Issue]) -> Iterator[Issue]:
+    """
+    Per batch of tickets, fetch the development information of those to be checked in batched GraphQL requests,
+    so that `nest_check_open_prs` reads it from the cache instead of one request per ticket.
+    """
+    for batch in batched(tickets, batch_size):
+        issue_ids = [
+            ticket.id
+            for ticket in batch
+            if ticket.id
+               and not should_skip_by_label(ticket, whitelisted_label)
+               and not should_skip_by_tailing_next_part(ticket)
+        ]
+
+        if issue_ids:
+            try:
+                resolved = jira_client.get_dev_summary_panels(issue_ids, JIRA_GRAPHQL_BATCH_SIZE, dev_summary_profile)
+                for issue_id, resp in resolved.items():
+                    dev_summary_cache.put(issue_id, resp)
+                logging.info(f"Resolved development information of {len(resolved)} tickets in batch")
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"Failed to resolve development information in batch: {e}")
 
-    return response.issues
+        yield from batch
+
+
+def with_pull_requests_resolved(tickets: Iterable[Issue]) -> Iterator[Issue]:
+    """
+    Per batch of tickets, resolve the OPEN PRs found in their (cached) development information
+    in a few GraphQL requests, so that `check_with_gh` reads them from the cache instead of one REST request per PR.
+    PRs with a stored ETag are left to `check_with_gh`, as their conditional REST request is free when unchanged.
+    The batch is ordered by `lookup_priority` first, so a low rate limit budget defers the least valuable lookups.
+    """
+    for batch in batched(tickets, batch_size):
+        batch = sorted(batch, key=lookup_priority)
+        pr_refs = []
+        for ticket in batch:
+            github_instance = extract_github_instance(dev_summary_cache.get(ticket.id)) if ticket.id else None
+            if github_instance:
+                pr_refs.extend(filter(None, (parse_pr_url(pr.url) for pr in list_open_prs(github_instance))))
+        pr_refs = [pr_ref for pr_ref in dict.fromkeys(pr_refs) if not github_client.can_revalidate_pr(*pr_ref)]
+
+        for chunk in batched(pr_refs, GITHUB_GRAPHQL_BATCH_SIZE):
+            if github_client.rate_limits.is_low('graphql', GITHUB_RATE_LIMIT_RESERVE):
+                logging.warning(f"Skipping batched GitHub PR resolution due to low rate limit budget: "
+                                f"{github_client.rate_limits.get('graphql')}")
+                break
+
+            try:
+                resolved = github_client.fetch_prs(chunk, GITHUB_GRAPHQL_BATCH_SIZE)
+                for pr_ref, pr in resolved.items():
+                    pull_request_cache.put(pr_ref, pr)
+                logging.info(f"Resolved {len(resolved)} GitHub PRs in batch")
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"Failed to resolve GitHub PRs in batch: {e}")
+                break
+
+        yield from batch
+
+
+def lookup_priority(ticket: Issue) -> tuple[bool, float]:
+    """
+    Sort key of the PR lookups: tickets to be checked before whitelisted ones, the most recently updated first.
+    """
+    updated = ticket.updated_at()
+    return should_skip_by_label(ticket, whitelisted_label), -updated.timestamp() if updated else 0.0
 
 
 def nest_check_open_prs(ticket: Issue, linked_ticket_key: Optional[str]) -> list[PullRequest]:
@@ -109,13 +212,16 @@ def nest_check_open_prs(ticket: Issue, linked_ticket_key: Optional[str]) -> list
         logging.info(
             f"[{determine_relationship(ticket_key, heading_key)}] Tracing for its heading ticket ({heading_key})..."
         )
-        heading_ticket = jira_client.fetch_issue(heading_key)
+        heading_ticket = jira_client.get_issue(heading_key, heading_ticket_fields)
         heading_result = nest_check_open_prs(heading_ticket, ticket_key)
         if heading_result:
             return heading_result
 
     ## check this ticket
-    resp = jira_client.get_dev_summary_panel_one_click_urls(issue_id)
+    resp = dev_summary_cache.get_or_load(
+        issue_id,
+        lambda: jira_client.get_dev_summary_panel_one_click_urls(issue_id, dev_summary_profile)
+    )
 
     github_instance = extract_github_instance(resp)
     if not github_instance:
@@ -142,45 +248,80 @@ def extract_github_instance(resp: DevSummaryPanelResponse) -> Optional[InstanceT
     return None
 
 
-def extract_open_prs(github: InstanceType, ticket_key: str) -> list[PullRequest]:
+def pull_request_states(ticket: Issue) -> Optional[str]:
+    """
+    The PRs of the ticket and their status, from its (cached) development information, for the verdict fingerprint.
+    None if not resolved, or for tailing tickets, whose verdict also depends on the PRs of their heading ticket.
+    """
+    summary = getattr(ticket.fields, "summary", None) if ticket.fields else None
+    resp = dev_summary_cache.get(ticket.id) if ticket.id else None
+    if not resp or (summary and is_custom_clone_summary(summary)):
+        return None
+
+    github_instance = extract_github_instance(resp)
+    if not github_instance:
+        return ""
+
+    prs = list(github_instance.danglingPullRequests or [])
+    for repo in github_instance.repository or []:
+        prs.extend(repo.pullRequests or [])
+    return ",".join(sorted({f"{pr.url} {pr.status}" for pr in prs}))
+
+
+def list_open_prs(github: InstanceType) -> list[PullRequest]:
     """
-    Extract all OPEN PRs from a GitHub instance. (DRAFT is allowed)
+    All OPEN PRs of a GitHub instance, dangling or by repository. (DRAFT is allowed)
     """
     result: list[PullRequest] = []
 
     if github.danglingPullRequests:
-        opens = [pr for pr in github.danglingPullRequests if pr.status and pr.status == 'OPEN']
-        for open_pr in opens:
-            url = open_pr.url
-            if not check_with_gh(url, ticket_key):
-                result.append(open_pr)
+        result.extend(pr for pr in github.danglingPullRequests if pr.status and pr.status == 'OPEN')
 
     if github.repository:
         for repo in github.repository:
             if repo.pullRequests:
-                opens = [pr for pr in repo.pullRequests if pr.status and pr.status == 'OPEN']
-                for open_pr in opens:
-                    url = open_pr.url
-                    if not check_with_gh(url, ticket_key):
-                        result.append(open_pr)
+                result.extend(pr for pr in repo.pullRequests if pr.status and pr.status == 'OPEN')
 
-    return result
+    ## The same PR can be listed both as dangling and under its repository
+    unique_prs: dict[object, PullRequest] = {}
+    for pr in result:
+        unique_prs.setdefault(parse_pr_url(pr.url) or pr.url, pr)
 
+    return list(unique_prs.values())
 
-def check_with_gh(url: str | None, ticket_key: str) -> bool:
+
+def extract_open_prs(github: InstanceType, ticket_key: str) -> list[PullRequest]:
     """
-    :return TRUE if the status at gh is closed.
+    Extract all OPEN PRs from a GitHub instance, which are still open at GitHub and related to the ticket.
+    """
+    return [open_pr for open_pr in list_open_prs(github) if not check_with_gh(open_pr.url, ticket_key)]
+
+
+def parse_pr_url(url: str | None) -> Optional[tuple[str, str, int]]:
+    """
+    :return: (owner, repo, PR number) of a GitHub PR url, normalized as GitHub names are case-insensitive
     """
     if not url:
-        return False
+        return None
 
-    ## Example URL: https://github.com/owner/repo/pull/123
-    m = re.match(r"https://github.com/([^/]+)/([^/]+)/pull/(\d+)", url)
+    ## Example URL: https://github.com/owner/repo/pull/123, possibly with `/files`, a query or a fragment
+    m = re.match(r"https?://(?:www\.)?github\.com/([^/]+)/([^/]+)/pull/(\d+)", url.strip(), re.IGNORECASE)
     if not m:
+        return None
+
+    return m.group(1).lower(), m.group(2).lower(), int(m.group(3))
+
+
+def check_with_gh(url: str | None, ticket_key: str) -> bool:
+    """
+    :return TRUE if the status at gh is closed.
+    """
+    pr_ref = parse_pr_url(url)
+    if not pr_ref:
         return False
 
-    owner, repo, pr_number = m.group(1), m.group(2), m.group(3)
-    pr = github_client.fetch_pr(owner, repo, pr_number)
+    owner, repo, pr_number = pr_ref
+    pr = pull_request_cache.get_or_load(pr_ref, lambda: fetch_pr_within_budget(owner, repo, pr_number))
 
     ## Consider closed if state is 'closed' or merged_at is not None
     if pr.state == 'closed' or pr.merged_at is not None:
@@ -193,9 +334,30 @@ def check_with_gh(url: str | None, ticket_key: str) -> bool:
     return False
 
 
+def fetch_pr_within_budget(owner: str, repo: str, pr_number: int) -> GitHubPullRequest:
+    """
+    Fetch a PR unless the REST rate limit budget is down to the reserve.
+
+    :raise RateLimitDeferredException: if the lookup should wait for a later run
+    """
+    pr_name = f"{owner}/{repo}#{pr_number}"
+    if github_client.rate_limits.is_low('core', GITHUB_RATE_LIMIT_RESERVE):
+        raise RateLimitDeferredException(
+            f"Deferred GH PR check of {pr_name} due to low rate limit budget: {github_client.rate_limits.get('core')}")
+
+    try:
+        return github_client.fetch_pr(owner, repo, pr_number)
+    except requests.exceptions.HTTPError as e:
+        ## Exhausted by this or another run in the meantime
+        is_rate_limited = e.response is not None and e.response.status_code in (403, 429)
+        if is_rate_limited and github_client.remaining_budget() == 0:
+            raise RateLimitDeferredException(f"Deferred GH PR check of {pr_name} due to exhausted rate limit") from e
+        raise
+
+
 def add_comment(ticket: Issue, open_prs: list[PullRequest]):
     ticket_key = ticket.key
-    user = jira_client.fetch_myself().display_name or "JIRA"
+    user = jira_client.get_myself().display_name or "JIRA"
     assignee_id = extract_assignee_id(ticket)
     reviewer_id = extract_reviewer_id(ticket)
 
@@ -396,12 +558,12 @@ def extract_reviewer_id(ticket: Issue) -> Optional[str]:
     return None
 
 
-def do_transition(ticket_key: str) -> None:
+def do_transition(ticket: Issue) -> None:
     """
     Perform the transition to "Reopen" state for a given ticket.
-    :param ticket_key: Ticket in "Done" / "Accepted" status
+    :param ticket: Ticket in "Done" / "Accepted" status
     """
 
     ## Perform the transition once
     target_state = "Reopen (CAT)"
-    perform_transition(ticket_key, target_state)
+    perform_transition(ticket, target_state)
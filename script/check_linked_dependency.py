@@ -1,4 +1,7 @@
 import logging
+import time
+from datetime import timedelta
+from typing import Iterable, Iterator
 
 import requests
 
@@ -6,119 +9,173 @@ from constants import *
 from environment import *
 from jira import *
 from jira.jiramodel import *
+from .executor import TicketOutcome, process_tickets, batched
+from .incremental import incremental_window, advance_watermark
+from .snapshot import TicketQuery, TicketSnapshot
 from .utils import print_conclusion, should_skip_by_label, find_heading_ticket, extract_reporter_id, \
-    extract_issue_links
+    extract_issue_links, has_status_in, is_in_project
+from .verdicts import without_unchanged_passed, recording_verdicts
 
 ##
+check_name = "linked_dependency"  # of the incremental watermark
 sprint_field = SPRINT_FIELD  # This is the field ID for the Sprint field in JIRA
 whitelisted_label = WHITELISTED_LABEL
+batch_size = 200  # same as a search page
 
 
 ####
 
 
-def check_for_linked_dependency():
+def check_for_linked_dependency(snapshot: Optional[TicketSnapshot] = None):
     """
     :return: `true` if ticket contains a valid remote link
     """
     logging.info("Checking for linked dependencies... ⚠️")
 
-    tickets = fetch_tickets()
-    ticket_keys = [ticket.key for ticket in tickets]
-    logging.info(f"Found {len(ticket_keys)} tickets with linked dependencies: {ticket_keys}")
+    started_at = snapshot.fetched_at if snapshot else time.time()
+    process = recording_verdicts(check_name, process_ticket, linked_ticket_sprints)
+    tickets = snapshot.select(check_name) if snapshot else ticket_query().fetch()
+    ## Linked tickets first, a passing verdict only holds for the same sprints of those
+    tickets = without_unchanged_passed(check_name, with_linked_tickets_resolved(tickets), linked_ticket_sprints)
+    bad_tickets, error_tickets, _ = process_tickets(tickets, process, JIRA_CHECK_WORKERS)
 
-    bad_tickets: list[str] = []
-    error_tickets: list[str] = []
+    print_conclusion(bad_tickets, error_tickets)
+    if len(error_tickets) == 0:
+        advance_watermark(check_name, started_at)
+    return len(error_tickets) == 0
 
-    for ticket in tickets:
-        ticket_key = ticket.key
-        warnings = []
 
-        logging.info(f"[{ticket_key}] Processing ticket...")
+def process_ticket(ticket: Issue) -> TicketOutcome:
+    ticket_key = ticket.key
+    warnings = []
 
-        try:
-            if should_skip_by_label(ticket, whitelisted_label):
-                logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
-                continue
+    logging.info(f"[{ticket_key}] Processing ticket...")
 
-            heading_ticket = find_heading_ticket(ticket)
-            if heading_ticket:
-                logging.info(f"[{ticket_key}] Skipping due to it is a cloned ticket...")
-                continue
+    try:
+        if should_skip_by_label(ticket, whitelisted_label):
+            logging.info(f"[{ticket_key}] Skipping due to whitelisted label...")
+            return TicketOutcome()
 
-            ticket_sprints = extract_sprints(ticket)
-            if not ticket_sprints:
-                logging.info(f"[{ticket_key}] Skipping due to no sprint...")
-                continue
+        heading_ticket = find_heading_ticket(ticket)
+        if heading_ticket:
+            logging.info(f"[{ticket_key}] Skipping due to it is a cloned ticket...")
+            return TicketOutcome()
 
-            linked_issues = extract_issue_links(ticket)
-            if not linked_issues:
-                logging.info(f"[{ticket_key}] Skipping due to no linked issues found...")
-                continue
+        ticket_sprints = extract_sprints(ticket)
+        if not ticket_sprints:
+            logging.info(f"[{ticket_key}] Skipping due to no sprint...")
+            return TicketOutcome()
 
-            for linked_issue in linked_issues:
-                if not should_process(linked_issue):
-                    logging.info(f"[{ticket_key}] Skipping due to not in target relations...")
-                    continue
+        linked_issues = extract_issue_links(ticket)
+        if not linked_issues:
+            logging.info(f"[{ticket_key}] Skipping due to no linked issues found...")
+            return TicketOutcome()
 
-                ## only concerns start
-                logging.info(f"[{ticket_key}] Processing ticket on {linked_issue}...")
+        for linked_issue in linked_issues:
+            if not should_process(linked_issue):
+                logging.info(f"[{ticket_key}] Skipping due to not in target relations...")
+                continue
 
-                if linked_issue.inward_issue:
-                    linked_ticket = jira_client.fetch_issue(linked_issue.inward_issue.key)
-                    linked_ticket_sprints = extract_sprints(linked_ticket)
+            ## only concerns start
+            logging.info(f"[{ticket_key}] Processing ticket on {linked_issue}...")
 
-                    if not is_origin_started_later(ticket_sprints, linked_ticket_sprints):
-                        msg = f"{ticket_key} should be at later/same sprint than {linked_ticket.key}"
-                        logging.warning(f"[{ticket_key}] {msg} (Linked ticket) ❌")
-                        warnings.append(msg)
+            if linked_issue.inward_issue:
+                linked_ticket = jira_client.get_issue(linked_issue.inward_issue.key, [sprint_field])
+                linked_ticket_sprints = extract_sprints(linked_ticket)
 
-                if linked_issue.outward_issue:
-                    linked_ticket = jira_client.fetch_issue(linked_issue.outward_issue.key)
-                    linked_ticket_sprints = extract_sprints(linked_ticket)
+                if not is_origin_started_later(ticket_sprints, linked_ticket_sprints):
+                    msg = f"{ticket_key} should be at later/same sprint than {linked_ticket.key}"
+                    logging.warning(f"[{ticket_key}] {msg} (Linked ticket) ❌")
+                    warnings.append(msg)
 
-                    if not is_origin_started_earlier(ticket_sprints, linked_ticket_sprints):
-                        msg = f"{ticket_key} should be at earlier/same sprint than {linked_ticket.key}"
-                        logging.warning(f"[{ticket_key}] {msg} (Linked ticket) ❌")
-                        warnings.append(msg)
+            if linked_issue.outward_issue:
+                linked_ticket = jira_client.get_issue(linked_issue.outward_issue.key, [sprint_field])
+                linked_ticket_sprints = extract_sprints(linked_ticket)
 
-            if warnings:
-                logging.info(f"[{ticket_key}] Found {len(warnings)} warnings, adding to ticket comments...")
+                if not is_origin_started_earlier(ticket_sprints, linked_ticket_sprints):
+                    msg = f"{ticket_key} should be at earlier/same sprint than {linked_ticket.key}"
+                    logging.warning(f"[{ticket_key}] {msg} (Linked ticket) ❌")
+                    warnings.append(msg)
 
-                ## Action
-                add_comment(ticket, warnings)
+        if warnings:
+            logging.info(f"[{ticket_key}] Found {len(warnings)} warnings, adding to ticket comments...")
 
-                bad_tickets.append(f"{ticket_key} ({len(warnings)})")
+            ## Action
+            add_comment(ticket, warnings)
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"[{ticket_key}] Encountered RequestException: {e}")
-            error_tickets.append(ticket_key)
-            continue
+            return TicketOutcome(bad=f"{ticket_key} ({len(warnings)})")
 
-    print_conclusion(bad_tickets, error_tickets)
-    return len(error_tickets) == 0
+    except requests.exceptions.RequestException as e:
+        logging.error(f"[{ticket_key}] Encountered RequestException: {e}")
+        return TicketOutcome(error=ticket_key)
+
+    return TicketOutcome()
 
 
 ####
 
-def fetch_tickets() -> list[Issue]:
+def ticket_query() -> TicketQuery:
     ## get the last week updated tickets with sprint values
     status_list = ['Backlog', 'New']
-    time_range = "5d"  # e.g.: h,d,w
+    time_range = timedelta(days=5)
     project = JIRA_PROJECT_KEY
 
-    jql = f'updated >= -{time_range} and sprint != empty and issueLinkType IS NOT EMPTY and status IN ({", ".join(status_list)}) and project = {project}'
-    fields = ["assignee", "status", "labels", f"{sprint_field}", "issuelinks", "summary"]
+    jql = f'sprint != empty and issueLinkType IS NOT EMPTY and status IN ({", ".join(status_list)}) and project = {project}'
+    fields = ["assignee", "status", "updated", "labels", f"{sprint_field}", "issuelinks", "summary"]
 
     params = SearchTicketsParams(
         jql=jql,
         fields=fields,
+        updated_window=incremental_window(check_name, UpdatedWindow(since=time_range))
     )
 
-    logging.info("Fetching tickets with JQL: '%s'...", jql)
-    response: SearchTicketsResponse = jira_client.fetch_search(params)
+    def is_target(ticket: Issue) -> bool:
+        return (bool(getattr(ticket.fields, sprint_field, None))
+                and bool(extract_issue_links(ticket))
+                and has_status_in(ticket, status_list)
+                and is_in_project(ticket, project))
+
+    return TicketQuery(check_name, params, is_target)
 
-    return response.issues
+
+def with_linked_tickets_resolved(tickets: Iterable[Issue]) -> Iterator[Issue]:
+    """
+    Per batch of tickets, resolve all their Gantt-linked tickets in bulk (sprint field only),
+    so that `process_ticket` reads them from the issue cache instead of one request per link.
+    """
+    for batch in batched(tickets, batch_size):
+        linked_keys = [linked_key for ticket in batch for linked_key in linked_ticket_keys(ticket)]
+
+        if linked_keys:
+            try:
+                resolved = jira_client.get_issues(linked_keys, [sprint_field])
+                logging.info(f"Resolved {len(resolved)} linked tickets for {len(batch)} tickets in bulk")
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"Failed to resolve linked tickets in bulk: {e}")
+
+        yield from batch
+
+
+def linked_ticket_keys(ticket: Issue) -> list[str]:
+    return [
+        linked.key
+        for issue_link in extract_issue_links(ticket) if should_process(issue_link)
+        for linked in (issue_link.inward_issue, issue_link.outward_issue) if linked
+    ]
+
+
+def linked_ticket_sprints(ticket: Issue) -> Optional[str]:
+    """
+    The Gantt-linked tickets and their sprints, from the issue cache, for the verdict fingerprint.
+    None if any of them is not resolved.
+    """
+    states = []
+    for linked_key in sorted(set(linked_ticket_keys(ticket))):
+        linked_ticket = jira_client.get_cached_issue(linked_key, [sprint_field])
+        if not linked_ticket:
+            return None
+        states.append(f"{linked_key} {[sprint.start_date for sprint in extract_sprints(linked_ticket)]}")
+    return ",".join(states)
 
 
 def extract_sprints(ticket: Issue) -> list[Sprint]:
@@ -185,7 +242,7 @@ def add_comment(ticket: Issue, warnings: list[str]) -> None:
     """
 
     ticket_key = ticket.key
-    user = jira_client.fetch_myself().display_name or "JIRA"
+    user = jira_client.get_myself().display_name or "JIRA"
     reporter_id = extract_reporter_id(ticket)
 
     comment = {
@@ -0,0 +1,189 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from jira.jiramodel import Issue
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+#### Model ####
+
+@dataclass
+class TicketOutcome:
+    bad: Optional[str] = None  # entry for the bad tickets of the conclusion
+    error: Optional[str] = None  # entry for the error tickets of the conclusion
+    deferred: Optional[str] = None  # entry for the tickets left to a later run
+
+
+#### Log capture ####
+
+_local = threading.local()
+
+
+class _CaptureFilter(logging.Filter):
+    """
+    Hold back records of threads that are capturing, so they can be emitted later as one block.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        records = getattr(_local, 'records', None)
+        if records is None:
+            return True
+
+        ## Same record is seen once per handler
+        if not records or records[-1] is not record:
+            records.append(record)
+        return False
+
+
+_capture_filter = _CaptureFilter()
+
+
+def _install_capture_filter() -> None:
+    for handler in logging.getLogger().handlers:
+        if _capture_filter not in handler.filters:
+            handler.addFilter(_capture_filter)
+
+
+@contextmanager
+def capture_logs() -> Iterator[list[logging.LogRecord]]:
+    _install_capture_filter()
+
+    outer = getattr(_local, 'records', None)
+    records: list[logging.LogRecord] = []
+    _local.records = records
+    try:
+        yield records
+    finally:
+        _local.records = outer
+
+
+def replay_logs(records: list[logging.LogRecord]) -> None:
+    for record in records:
+        logging.getLogger(record.name).handle(record)
+
+
+#### Execution ####
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """
+    Like `map`, but running up to `workers` calls concurrently.
+    Items are consumed lazily with a bounded number in flight, and results are yielded in input order.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='worker') as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Consume `items` lazily in lists of up to `size`.
+    """
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def grouped_map(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """
+    Like `ordered_map`, but the logs of each call are emitted as one contiguous block, in the same order as serial mode.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    for is_success, result, records in ordered_map(lambda item: _call_captured(fn, item), items, workers):
+        replay_logs(records)
+        if not is_success:
+            raise result
+        yield result
+
+
+def first_match(fn: Callable[[T], Optional[R]],
+                items: Iterable[T],
+                executor: Optional[Executor] = None,
+                is_cheap: Callable[[T], bool] = lambda item: False
+                ) -> Optional[R]:
+    """
+    The first truthy `fn(item)` in input order. Items which are not `is_cheap` (e.g. not cached) are run on the
+    shared `executor` side by side, the others inline once reached.
+    Calls not started by the time of the match are cancelled; logs are emitted as in serial mode, up to the match.
+    """
+    items = list(items)
+    slow_indexes = [i for i, item in enumerate(items) if not is_cheap(item)]
+    futures = {
+        i: executor.submit(_call_captured, fn, items[i])
+        for i in slow_indexes
+    } if executor and len(slow_indexes) > 1 else {}
+
+    try:
+        for i, item in enumerate(items):
+            future = futures.get(i)
+            if future is None:
+                result = fn(item)
+            else:
+                is_success, result, records = future.result()
+                replay_logs(records)
+                if not is_success:
+                    raise result
+            if result:
+                return result
+        return None
+    finally:
+        ## Calls already running are left to finish in the background
+        for future in futures.values():
+            future.cancel()
+
+
+def _call_captured(fn: Callable[[T], R], item: T) -> tuple[bool, R | Exception, list[logging.LogRecord]]:
+    with capture_logs() as records:
+        try:
+            return True, fn(item), records
+        except Exception as e:
+            return False, e, records
+
+
+def process_tickets(tickets: Iterable[Issue],
+                    process: Callable[[Issue], TicketOutcome],
+                    workers: int = 1
+                    ) -> tuple[list[str], list[str], list[str]]:
+    """
+    Process each ticket, concurrently when `workers` > 1.
+
+    :return: bad tickets, error tickets and deferred tickets
+    """
+    bad_tickets: list[str] = []
+    error_tickets: list[str] = []
+    deferred_tickets: list[str] = []
+
+    for outcome in grouped_map(process, tickets, workers):
+        if outcome.bad:
+            bad_tickets.append(outcome.bad)
+        if outcome.error:
+            error_tickets.append(outcome.error)
+        if outcome.deferred:
+            deferred_tickets.append(outcome.deferred)
+
+    return bad_tickets, error_tickets, deferred_tickets
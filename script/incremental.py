@@ -0,0 +1,44 @@
+import logging
+import time
+from datetime import timedelta
+
+from cache import new_state_store
+from environment import *
+from jira.jiramodel import UpdatedWindow
+
+##
+## check name -> epoch seconds at which its last successful run started searching
+watermark_store = new_state_store("watermarks")
+overlap = timedelta(hours=JIRA_INCREMENTAL_OVERLAP_HOURS)  # for clock skew and tickets updated mid-search
+
+
+####
+
+def incremental_window(check_name: str, window: UpdatedWindow) -> UpdatedWindow:
+    """
+    In incremental mode, narrow `window` to the tickets which entered it since the last successful run of the check,
+    with an overlap margin. The full window otherwise, or on the first run.
+    """
+    if not JIRA_INCREMENTAL:
+        return window
+
+    watermark = watermark_store.get(check_name)
+    if watermark is None:
+        logging.info(f"No watermark of '{check_name}' yet, searching the full window")
+        return window
+
+    ## A ticket enters the window once its `updated` passes `until`
+    since = timedelta(seconds=max(0.0, time.time() - watermark)) + window.until + overlap
+    if since >= window.since:
+        return window
+
+    logging.info(f"Searching '{check_name}' incrementally, since the last run at {time.ctime(watermark)}")
+    return UpdatedWindow(since=since, until=window.until)
+
+
+def advance_watermark(check_name: str, started_at: float) -> None:
+    """
+    Record a successful run of the check which started searching at `started_at` (epoch seconds).
+    """
+    if JIRA_INCREMENTAL:
+        watermark_store.put(check_name, started_at)
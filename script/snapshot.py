@@ -0,0 +1,99 @@
+import logging
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Callable, Iterator
+
+from environment import *
+from jira import *
+from jira.jiramodel import *
+from .utils import transitioned_ticket_keys
+
+
+#### Model ####
+
+@dataclass
+class TicketQuery:
+    """
+    Tickets a check works on: as search params for the server, and as the same filter over a shared snapshot.
+    """
+    check_name: str
+    params: SearchTicketsParams
+    predicate: Callable[[Issue], bool]  # the JQL of `params`, besides its `updated_window`
+
+    def matches(self, ticket: Issue, now: datetime) -> bool:
+        window = self.params.updated_window
+        if window and not window.contains(ticket.updated_at(), now):
+            return False
+        return self.predicate(ticket)
+
+    def fetch(self) -> Iterator[Issue]:
+        """
+        Search the tickets on their own, streamed page by page so processing starts before the last page arrives.
+        """
+        params = self.params.anchored(jira_client.jql_now())
+        logging.info("Fetching tickets with JQL: '%s'...", params.to_jql())
+        for page in jira_client.iter_search_pages(params, JIRA_SEARCH_SLICES):
+            logging.info(f"Found {len(page.issues)} tickets: {[ticket.key for ticket in page.issues]}")
+            yield from page.issues
+
+
+@dataclass
+class TicketSnapshot:
+    """
+    Tickets of several checks fetched by one search, each check reading its own view.
+    """
+    queries: dict[str, TicketQuery]
+    issues: list[Issue]
+    fetched_at: float  # epoch seconds at which the search started
+
+    def select(self, check_name: str) -> list[Issue]:
+        """
+        Tickets of the check, leaving out those transitioned by an earlier check of the run:
+        their status in the snapshot is stale, and the search of the check would not return them anymore.
+        """
+        query = self.queries[check_name]
+        now = datetime.fromtimestamp(self.fetched_at, timezone.utc)
+        tickets = [ticket for ticket in self.issues if query.matches(ticket, now)]
+
+        transitioned = [ticket.key for ticket in tickets if ticket.key in transitioned_ticket_keys]
+        if transitioned:
+            logging.info(f"Leaving out tickets transitioned earlier in this run: {transitioned}")
+        tickets = [ticket for ticket in tickets if ticket.key not in transitioned_ticket_keys]
+
+        logging.info(f"Selected {len(tickets)} tickets from the shared snapshot: {[ticket.key for ticket in tickets]}")
+        return tickets
+
+
+####
+
+def fetch_snapshot(queries: list[TicketQuery]) -> TicketSnapshot:
+    """
+    Search once for the union of `queries`, with the superset of their fields.
+    """
+    fetched_at = time.time()
+
+    ## One anchor for the union and for each check's view of it
+    now = jira_client.jql_now()
+    queries = [replace(query, params=query.params.anchored(now)) for query in queries]
+
+    windows = [query.params.updated_window for query in queries]
+    window = UpdatedWindow(
+        since=max(window.since for window in windows),
+        until=min(window.until for window in windows),
+        now=windows[0].now
+    ) if all(windows) else None
+    jql = " or ".join(f"({query.params.to_jql()})" for query in queries)
+    fields = list(dict.fromkeys(field for query in queries for field in query.params.fields.split(",")))
+
+    ## `updated` is needed to tell the window of each check apart
+    params = SearchTicketsParams(jql=f"({jql})", fields=[*fields, "updated"] if "updated" not in fields else fields,
+                                 updated_window=window)
+
+    logging.info("Fetching shared ticket snapshot with JQL: '%s'...", params.to_jql())
+    issues: list[Issue] = []
+    for page in jira_client.iter_search_pages(params, JIRA_SEARCH_SLICES):
+        issues.extend(page.issues)
+    logging.info(f"Found {len(issues)} tickets for {len(queries)} checks in the shared snapshot")
+
+    return TicketSnapshot({query.check_name: query for query in queries}, issues, fetched_at)
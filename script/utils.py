@@ -1,12 +1,34 @@
 import logging
 import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator
 
 import requests
 
-from exception.exceptionmodel import UnexpectedException
+from cache import JsonStateStore, new_state_store
+from exception.exceptionmodel import UnexpectedException, TransitionNotFoundException
 from jira import *
 from jira.jiramodel import *
 
+##
+reopen_or_rework_reason_field_id = "customfield_13259"
+code_review_feedback_id = "14403"
+## Read on a heading ticket by the deployment note and GitHub checks; one projection for both,
+## so that a heading ticket they share is fetched once per run
+heading_ticket_fields = ["summary", "issuelinks", "fixVersions"]
+## "{project}/{issue type id}/{transition id}" -> whether the transition screen accepts the reason field,
+## created on the first transition needing it, and learnt again once older than the TTL as screens get edited
+_transition_screen_store: Optional[JsonStateStore] = None
+_transition_screen_store_lock = threading.Lock()
+transition_screen_ttl = timedelta(days=1)
+## Tickets transitioned in this run, by any check; their fetched status is stale for the other checks
+transitioned_ticket_keys: set[str] = set()
+_ticket_locks: dict[str, threading.Lock] = {}
+_ticket_locks_lock = threading.Lock()
+
 
 ###
 
@@ -19,6 +41,16 @@ def should_skip_by_label(ticket: Issue, whitelisted_label: str) -> bool:
     return False
 
 
+def has_status_in(ticket: Issue, status_list: list[str]) -> bool:
+    ## Status names in JQL are case-insensitive
+    status = ticket.fields.status if ticket.fields else None
+    return bool(status) and status.name.lower() in (name.lower() for name in status_list)
+
+
+def is_in_project(ticket: Issue, project: str) -> bool:
+    return ticket.key.upper().startswith(f"{project.upper()}-")
+
+
 def is_custom_clone_summary(summary: str) -> bool:
     ## part N or Part N
     regex_pattern = r".*\bPart\s*\d+.*$"
@@ -115,87 +147,189 @@ def extract_reporter_id(ticket: Issue) -> Optional[str]:
     return reporter.account_id if reporter else None
 
 
-def print_conclusion(bad_tickets: list[str], error_tickets: list[str]):
+def print_conclusion(bad_tickets: list[str], error_tickets: list[str], deferred_tickets: Optional[list[str]] = None):
     logging.info("Conclusion: \n%d bad tickets: %s, \n%d error tickets: %s",
                  len(bad_tickets), bad_tickets,
                  len(error_tickets), error_tickets
                  )
+    if deferred_tickets:
+        logging.warning("%d deferred tickets, to be checked by a later run: %s", len(deferred_tickets), deferred_tickets)
+
 
+@contextmanager
+def acting_on(ticket: Issue) -> Iterator[bool]:
+    """
+    Serialize the transition-and-comment step of the checks on the same ticket, as the deployment note and
+    GitHub checks both reopen Done / Accepted tickets, possibly at the same time.
 
-def perform_one_of_transitions(ticket_key: str, target_states: list[str]) -> None:
+    :return: (as context) False if the ticket was transitioned by another check in this run,
+    so acting on its fetched status would repeat or fail the transition
+    """
+    with _ticket_locks_lock:
+        lock = _ticket_locks.setdefault(ticket.key, threading.Lock())
+
+    with lock:
+        yield ticket.key not in transitioned_ticket_keys
+
+
+def perform_one_of_transitions(ticket: Issue, target_states: list[str]) -> None:
+    ticket_key = ticket.key
     for target_state in target_states:
         try:
-            perform_transition(ticket_key, target_state)
+            perform_transition(ticket, target_state)
             return
-        except (requests.exceptions.RequestException, UnexpectedException):
+        except (requests.exceptions.RequestException, UnexpectedException) as e:
             is_last = target_state == target_states[-1]
             if is_last:
                 logging.error(f"[{ticket_key}] Failed to transition to all target states: {target_states}")
                 raise
+            elif isinstance(e, TransitionNotFoundException):
+                logging.info(f"[{ticket_key}] No transition to '{target_state}', trying next target state...")
+                continue
             else:
                 logging.warning(
                     f"[{ticket_key}] Failed to transition to '{target_state}', trying next target state if any...")
                 continue
 
 
-def perform_transition(ticket_key: str, target_state: str) -> None:
-    response: TransitionsResponse = jira_client.fetch_transitions(ticket_key)
-    available_transitions = response.transitions
-    target_transition_id = find_target_transition_id(available_transitions, target_state)
+def perform_transition(ticket: Issue, target_state: str) -> None:
+    ticket_key = ticket.key
+    workflow_state = extract_workflow_state(ticket)
+    is_cached = workflow_state is not None and workflow_state in jira_client.transitions_cache
+
+    response: TransitionsResponse = jira_client.get_transitions(ticket_key, workflow_state)
+    target_transition_id = find_target_transition_id(response.transitions, target_state)
 
     if not target_transition_id:
-        error_msg = f"[{ticket_key}] Target state '{target_state}' not found"
-        logging.error(error_msg)
-        raise UnexpectedException(error_msg)
+        raise TransitionNotFoundException(f"[{ticket_key}] Target state '{target_state}' not found")
+
+    ## Perform the transition
+    try:
+        transit(ticket_key, workflow_state, target_transition_id, target_state)
+    except requests.exceptions.HTTPError as e:
+        is_rejected = e.response is not None and e.response.status_code == 400
+        if not is_cached or not is_rejected:
+            raise
+
+        ## The transitions shared by its workflow state do not apply to this ticket, e.g. by a workflow condition
+        logging.warning(f"[{ticket_key}] Cached transition to '{target_state}' rejected, fetching its transitions...")
+        target_transition_id = fetch_target_transition_id(ticket_key, target_state)
+        if not target_transition_id:
+            raise TransitionNotFoundException(f"[{ticket_key}] Target state '{target_state}' not found")
+
+        transit(ticket_key, workflow_state, target_transition_id, target_state)
+
+    transitioned_ticket_keys.add(ticket_key)
+    logging.info(f"[{ticket_key}] Transited to '{target_state}' (id: {target_transition_id})")
+    return
+
 
-    additional_fields_dict: dict[str, Any] = {}
+def fetch_target_transition_id(ticket_key: str, target_state: str) -> Optional[str]:
+    """
+    Id of the transition to `target_state`, among the transitions fetched live for the ticket.
+    """
+    response: TransitionsResponse = jira_client.fetch_transitions(ticket_key)
+    return find_target_transition_id(response.transitions, target_state)
+
+
+def transit(ticket_key: str,
+            workflow_state: Optional[tuple[str, str, str]],
+            transition_id: str,
+            target_state: str
+            ) -> None:
+    """
+    Do the transition, setting the mandatory reason of "Rework" / "Reopen (CAT)" along in one request
+    if the transition screen accepts it, or patching it beforehand otherwise.
+    """
+    if target_state not in ("Rework", "Reopen (CAT)"):
+        jira_client.do_transition(ticket_key, transition_id)
+        return
 
     ## To "Rework" / "Reopen", the reason is mandatory
-    reopen_or_rework_reason_field_id = "customfield_13259"
-    code_review_feedback_id = "14403"
-    if target_state == "Rework":
-        set_fields = {
-            "fields": {
-                reopen_or_rework_reason_field_id: [
-                    {
-                        "id": code_review_feedback_id
-                    }
-                ]
+    reason_fields = {
+        reopen_or_rework_reason_field_id: [
+            {
+                "id": code_review_feedback_id
             }
-        }
-
-        ### Explicitly patch since transition not support that field update in one go
-        jira_client.update_ticket_fields(ticket_key, set_fields)
-        logging.info(f"[{ticket_key}] Patched ticket with Reopen/Rework reason field")
-
-    if target_state == "Reopen (CAT)":
-        set_fields = {
-            "fields": {
-                reopen_or_rework_reason_field_id: [
-                    {
-                        "id": code_review_feedback_id
-                    }
-                ]
-            }
-        }
+        ]
+    }
 
-        ### Explicitly patch since transition not support that field update in one go
-        jira_client.update_ticket_fields(ticket_key, set_fields)
-        logging.info(f"[{ticket_key}] Patched ticket with Reopen/Rework reason field")
+    ## Learnt per issue type and transition, unknown (None) is tried in one go; without the issue type, never learnt
+    is_learnable = workflow_state is not None and workflow_state[1] is not None
+    screen_key = f"{workflow_state[0]}/{workflow_state[1]}/{transition_id}" if is_learnable else None
+    is_reason_on_screen = get_reason_on_screen(screen_key) if screen_key else None
+
+    if is_reason_on_screen is not False:
+        try:
+            jira_client.do_transition(ticket_key, transition_id, {"fields": reason_fields})
+            if screen_key and is_reason_on_screen is None:
+                put_reason_on_screen(screen_key, True)
+            return
+        except requests.exceptions.HTTPError as e:
+            if not is_field_not_on_screen(e, reopen_or_rework_reason_field_id):
+                raise
+
+            logging.info(f"[{ticket_key}] Reason field not on the transition screen, patching it beforehand...")
+            if screen_key:
+                put_reason_on_screen(screen_key, False)
+
+    ### Explicitly patch since the transition does not support that field update in one go
+    jira_client.update_ticket_fields(ticket_key, {"fields": reason_fields})
+    logging.info(f"[{ticket_key}] Patched ticket with Reopen/Rework reason field")
+
+    jira_client.do_transition(ticket_key, transition_id)
+
+
+def is_field_not_on_screen(e: requests.exceptions.HTTPError, field_id: str) -> bool:
+    """
+    :return: `true` if the request was rejected for the field, i.e. a 400 with the field in `errors`.
+    The message, "It is not on the appropriate screen, or unknown.", is localized so it is not matched.
+    """
+    if e.response is None or e.response.status_code != 400:
+        return False
 
-    ## Perform the transition
     try:
-        jira_client.do_transition(
-            ticket_key,
-            target_transition_id,
-            additional_fields_dict if additional_fields_dict else None
-        )
-    except requests.exceptions.RequestException:
-        ## some issue type did not contain the additional fields
-        jira_client.do_transition(ticket_key, target_transition_id)
+        errors = e.response.json().get('errors') or {}
+    except ValueError:
+        return False
 
-    logging.info(f"[{ticket_key}] Transited to '{target_state}' (id: {target_transition_id})")
-    return
+    return isinstance(errors, dict) and field_id in errors
+
+
+def get_transition_screen_store() -> JsonStateStore:
+    global _transition_screen_store
+    with _transition_screen_store_lock:
+        if _transition_screen_store is None:
+            _transition_screen_store = new_state_store("transition_screens")
+        return _transition_screen_store
+
+
+def get_reason_on_screen(screen_key: str) -> Optional[bool]:
+    """
+    :return: whether the transition screen was found to accept the reason field, None if unknown or expired
+    """
+    entry = get_transition_screen_store().get(screen_key)
+    if not isinstance(entry, dict) or time.time() - entry['learnt_at'] >= transition_screen_ttl.total_seconds():
+        return None
+    return entry['is_on_screen']
+
+
+def put_reason_on_screen(screen_key: str, is_on_screen: bool) -> None:
+    get_transition_screen_store().put(screen_key, {'is_on_screen': is_on_screen, 'learnt_at': time.time()})
+
+
+def extract_workflow_state(ticket: Issue) -> Optional[tuple[str, str, str]]:
+    """
+    (project, issue type, status) of a ticket; tickets alike share the same transitions.
+    None if the issue type or status was not fetched.
+    """
+    issue_type = getattr(ticket.fields, "issuetype", None) if ticket.fields else None
+    status = ticket.fields.status if ticket.fields else None
+    if not issue_type or not issue_type.get('id') or not status or not status.id:
+        return None
+
+    project = ticket.key.rsplit('-', 1)[0]
+    return project, issue_type.get('id'), status.id
 
 
 def find_target_transition_id(transitions: list[Transition], target_state: str) -> str | None:
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, Optional
+
+from cache import new_verdict_store
+from environment import *
+from jira.jiramodel import Issue
+from .executor import TicketOutcome
+
+##
+verdict_store = new_verdict_store(timedelta(hours=JIRA_VERDICT_TTL_HOURS)) if JIRA_VERDICT_TTL_HOURS > 0 else None
+passed = "passed"
+
+
+####
+
+def without_unchanged_passed(check_name: str,
+                             tickets: Iterable[Issue],
+                             external_state: Callable[[Issue], Optional[str]] = lambda ticket: ""
+                             ) -> Iterator[Issue]:
+    """
+    Leave out the tickets which passed the check before and have not changed since, within the verdict TTL.
+    Needs the `updated` field. Only passing verdicts are reused, a bad ticket is always checked again.
+
+    :param external_state: digestible state the verdict depends on besides the fetched fields (e.g. the PRs
+        of the ticket), None when not known up front, then the ticket is always checked
+    """
+    for ticket in tickets:
+        updated = getattr(ticket.fields, "updated", None) if ticket.fields else None
+        if verdict_store and updated:
+            state = external_state(ticket)
+            if state is not None \
+                    and verdict_store.get(check_name, ticket.key, updated, fingerprint(ticket, state)) == passed:
+                logging.info(f"[{ticket.key}] Skipping as unchanged since it passed the last time ✅")
+                continue
+
+        yield ticket
+
+
+def recording_verdicts(check_name: str,
+                       process: Callable[[Issue], TicketOutcome],
+                       external_state: Callable[[Issue], Optional[str]] = lambda ticket: ""
+                       ) -> Callable[[Issue], TicketOutcome]:
+    """
+    Wrap `process` to record the verdict of each ticket, for `without_unchanged_passed` of a later run
+    with the same `external_state`.
+    """
+    if not verdict_store:
+        return process
+
+    def process_and_record(ticket: Issue) -> TicketOutcome:
+        outcome = process(ticket)
+
+        updated = getattr(ticket.fields, "updated", None) if ticket.fields else None
+        state = external_state(ticket)
+        if updated and state is not None:
+            verdict = "bad" if outcome.bad else "error" if outcome.error else "deferred" if outcome.deferred else passed
+            verdict_store.put(check_name, ticket.key, updated, fingerprint(ticket, state), verdict)
+
+        return outcome
+
+    return process_and_record
+
+
+def fingerprint(ticket: Issue, external_state: str = "") -> str:
+    """
+    Digest of the fetched fields the verdict depends on (e.g. labels, fixVersions, issue links, sprints),
+    and of the `external_state` given by the check.
+    The check passes what it resolves before the verdict filter, e.g. the PRs or the sprints of linked tickets.
+    Remote links and Confluence pages are only known after the API calls to be saved,
+    changes of those are caught by the verdict TTL, or by `updated` when they touch the ticket.
+    """
+    fields = {key: value for key, value in vars(ticket.fields).items() if key != "updated"}
+    content = json.dumps([fields, external_state], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
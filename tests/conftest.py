@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+## Before any module reads the environment: no network, no state carried over from a real run
+os.environ.setdefault('JIRA_DOMAIN', 'jira.invalid')
+os.environ.setdefault('JIRA_TOKEN', 'token')
+os.environ.setdefault('JIRA_PROJECT_KEY', 'ABC')
+os.environ['STATE_DIR'] = tempfile.mkdtemp(prefix='jira-checker-test-state-')
+os.environ['JIRA_INCREMENTAL'] = 'false'
+os.environ['JIRA_VERDICT_TTL_HOURS'] = '0'
@@ -0,0 +1,79 @@
+"""
+Fake JIRA / GitHub server: canned responses from a handler, mounted on a real `PooledSession`,
+so the clients run their retry, caching and parsing code without network access.
+"""
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from network import PooledSession, RetryPolicy
+
+Reply = Union[int, tuple]  # status, (status, body) or (status, body, headers)
+
+
+@dataclass
+class Call:
+    method: str
+    host: str
+    path: str
+    query: dict[str, str]
+    headers: CaseInsensitiveDict
+    json: Any = None
+
+
+class FakeServer(BaseAdapter):
+    """
+    Answers each request with `handler(call)`; the handler may also raise, e.g. `requests.ConnectionError`.
+    """
+
+    def __init__(self, handler: Callable[[Call], Reply]):
+        super().__init__()
+        self.handler = handler
+        self.calls: list[Call] = []
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        url = urlparse(request.url)
+        call = Call(
+            method=request.method,
+            host=url.netloc,
+            path=url.path,
+            query={key: values[0] for key, values in parse_qs(url.query).items()},
+            headers=CaseInsensitiveDict(request.headers),
+            json=json.loads(request.body) if request.body else None
+        )
+        with self._lock:
+            self.calls.append(call)
+
+        reply = self.handler(call)
+        status, body, headers = (reply, None, None) if isinstance(reply, int) else (*reply, None, None)[:3]
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode() if body is not None else b''
+        response.headers = CaseInsensitiveDict(headers or {})
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+    def paths(self, method: Optional[str] = None) -> list[str]:
+        return [call.path for call in self.calls if method is None or call.method == method]
+
+
+def fake_session(handler: Callable[[Call], Reply], retry_policy: Optional[RetryPolicy] = None
+                 ) -> tuple[PooledSession, FakeServer]:
+    session = PooledSession(pool_connections=1, pool_maxsize=1, pool_block=False, timeout=(1, 1),
+                            retry_policy=retry_policy)
+    server = FakeServer(handler)
+    session.mount('https://', server)
+    session.mount('http://', server)
+    return session, server
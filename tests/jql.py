@@ -0,0 +1,117 @@
+"""
+Evaluator of the JQL subset the checks search with, to compare their snapshot predicates against.
+"""
+import re
+from datetime import datetime, timedelta, tzinfo
+from typing import Optional
+
+from constants import SPRINT_FIELD
+from jira.jiramodel import Issue
+
+_TOKEN = re.compile(r'\s*(>=|<=|!=|=|<|>|\(|\)|,|"[^"]*"|[^\s(),"=<>!]+)')
+_DURATION = re.compile(r'-(\d+)([dhm])')
+
+
+def matches_jql(jql: str, ticket: Issue, now: datetime, time_zone: tzinfo) -> bool:
+    """
+    :param now: for relative dates, e.g. -5d
+    :param time_zone: of the searching account, for absolute dates, e.g. "2026/10/12 08:39"
+    """
+    tokens = _TOKEN.findall(jql)
+    parser = _Parser(tokens, ticket, now, time_zone)
+    result = parser.expression()
+    assert parser.position == len(tokens), f"Unparsed JQL: {tokens[parser.position:]}"
+    return result
+
+
+class _Parser:
+
+    def __init__(self, tokens: list[str], ticket: Issue, now: datetime, time_zone: tzinfo):
+        self.tokens = tokens
+        self.position = 0
+        self.ticket = ticket
+        self.now = now
+        self.time_zone = time_zone
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expression(self) -> bool:
+        result = self.term()
+        while (self.peek() or '').lower() == 'or':
+            self.take()
+            result = self.term() or result
+        return result
+
+    def term(self) -> bool:
+        result = self.factor()
+        while (self.peek() or '').lower() == 'and':
+            self.take()
+            result = self.factor() and result
+        return result
+
+    def factor(self) -> bool:
+        if self.peek() == '(':
+            self.take()
+            result = self.expression()
+            assert self.take() == ')'
+            return result
+        return self.clause()
+
+    def clause(self) -> bool:
+        field = self.take()
+        operator = self.take().lower()
+        if operator == 'is':
+            is_negated = self.peek().lower() == 'not'
+            if is_negated:
+                self.take()
+            assert self.take().lower() == 'empty'
+            return self.is_empty(field) != is_negated
+        if operator == 'in':
+            assert self.take() == '('
+            values = [self.take().strip('"')]
+            while self.take() == ',':
+                values.append(self.take().strip('"'))
+            return self.contains_any(field, values)
+
+        value = self.take()
+        if value.lower() == 'empty':
+            assert operator in ('=', '!=')
+            return self.is_empty(field) == (operator == '=')
+        if field == 'updated':
+            return self.compare_updated(operator, value)
+        if field == 'project':
+            is_equal = self.ticket.key.upper().startswith(f"{value.upper()}-")
+            return is_equal if operator == '=' else not is_equal
+        raise AssertionError(f"Unsupported clause: {field} {operator} {value}")
+
+    def is_empty(self, field: str) -> bool:
+        attribute = {'sprint': SPRINT_FIELD, 'issueLinkType': 'issuelinks'}[field]
+        return not getattr(self.ticket.fields, attribute, None)
+
+    def contains_any(self, field: str, values: list[str]) -> bool:
+        if field == 'status':
+            status = self.ticket.fields.status
+            return bool(status) and status.name.lower() in (value.lower() for value in values)
+        if field == 'labels':
+            return any(label in values for label in self.ticket.fields.labels or [])
+        raise AssertionError(f"Unsupported clause: {field} IN {values}")
+
+    def compare_updated(self, operator: str, value: str) -> bool:
+        updated = self.ticket.updated_at()
+        if updated is None:
+            return False
+
+        duration = _DURATION.fullmatch(value)
+        if duration:
+            amount, unit = int(duration.group(1)), duration.group(2)
+            bound = self.now - timedelta(**{{'d': 'days', 'h': 'hours', 'm': 'minutes'}[unit]: amount})
+        else:
+            bound = datetime.strptime(value.strip('"'), '%Y/%m/%d %H:%M').replace(tzinfo=self.time_zone)
+
+        return {'>=': updated >= bound, '<': updated < bound, '>': updated > bound, '<=': updated <= bound}[operator]
@@ -0,0 +1,97 @@
+import re
+
+import pytest
+
+from fakes import Call, fake_session
+from jira.jiraclient import JiraClient
+
+KNOWN_KEYS = {'ABC-1', 'ABC-2', 'ABC-3'}
+
+
+def handler(call: Call):
+    if call.path == '/rest/api/3/search/jql':
+        keys = re.fullmatch(r'key IN \((.*)\)', call.query['jql']).group(1).split(', ')
+        return 200, {'isLast': True, 'issues': [
+            {'id': key, 'key': key, 'fields': {'summary': f'Summary of {key}'}} for key in keys if key in KNOWN_KEYS]}
+    if call.path == '/jsw2/graphql':
+        return 200, dev_summary_reply(call.json['variables'])
+    return 200, {'id': 'ABC-9', 'key': 'ABC-9', 'fields': {'summary': 'Moved'}}
+
+
+def dev_summary_reply(aliases: dict[str, str]) -> dict:
+    """
+    One pull request per issue, an error for issue 404.
+    """
+    data = {}
+    errors = []
+    for alias, issue_id in aliases.items():
+        if issue_id == '404':
+            data[alias] = None
+            errors.append({'message': 'Issue not found', 'path': [alias]})
+            continue
+        data[alias] = {'details': {'instanceTypes': [{'type': 'GitHub', 'danglingPullRequests': [
+            {'url': f'https://github.com/o/r/pull/{issue_id}', 'status': 'OPEN'}]}]}}
+    return {'data': data, 'errors': errors}
+
+
+@pytest.fixture
+def jira():
+    session, server = fake_session(handler)
+    return JiraClient('jira.test', 'token', session), server
+
+
+def test_uncached_issues_are_searched_in_bulk(jira):
+    client, server = jira
+    client.get_issue('ABC-1', ['summary'])
+
+    issues = client.get_issues(['ABC-1', 'ABC-2', 'ABC-3', 'ABC-2'], ['summary'])
+
+    assert set(issues) == {'ABC-1', 'ABC-2', 'ABC-3'}
+    assert [call.query['jql'] for call in server.calls[1:]] == ['key IN (ABC-2, ABC-3)']
+    assert server.calls[1].query['fields'] == 'summary'
+
+
+def test_bulk_searched_issues_are_cached_for_the_run(jira):
+    client, server = jira
+    client.get_issues(['ABC-1', 'ABC-2'], ['summary'])
+
+    assert client.get_issue('ABC-2', ['summary']).key == 'ABC-2'
+    assert len(server.calls) == 1
+
+    client.get_issue('ABC-2', ['labels'])
+    assert server.paths()[1:] == ['/rest/api/3/issue/ABC-2']
+
+
+def test_bulk_search_is_chunked(jira):
+    client, server = jira
+
+    client.get_issues(['ABC-1', 'ABC-2', 'ABC-3'], ['summary'], chunk_size=2)
+
+    assert [call.query['jql'] for call in server.calls] == ['key IN (ABC-1, ABC-2)', 'key IN (ABC-3)']
+
+
+def test_issue_not_returned_by_the_search_is_left_out(jira):
+    client, server = jira
+
+    assert set(client.get_issues(['ABC-1', 'ABC-9'], ['summary'])) == {'ABC-1'}
+    assert client.get_issue('ABC-9', ['summary']).fields.summary == 'Moved'
+
+
+def test_development_information_is_fetched_in_aliased_batches(jira):
+    client, server = jira
+
+    panels = client.get_dev_summary_panels(['1', '2', '3', '1'], batch_size=2)
+
+    assert list(panels) == ['1', '2', '3']
+    assert [call.json['variables'] for call in server.calls] == \
+           [{'issue0': '1', 'issue1': '2'}, {'issue0': '3'}]
+    assert server.calls[0].json['query'].count('developmentInformation(issueId:') == 2
+
+
+def test_issue_whose_development_information_failed_is_left_out(jira, caplog):
+    client, server = jira
+
+    panels = client.get_dev_summary_panels(['1', '404'])
+
+    assert list(panels) == ['1']
+    assert "Failed to fetch development information for issue 404: Issue not found" in caplog.text
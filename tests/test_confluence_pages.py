@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import pytest
+
+from cache import JsonStateStore
+from fakes import Call, fake_session
+from jira.jiraclient import JiraClient
+
+PAGES = {'1': ('Release 1.2.3', 3), '2': ('Release 1.2.4', 1)}
+
+
+def page_body(page_id: str) -> dict:
+    title, version = PAGES[page_id]
+    return {'id': page_id, 'title': title, 'version': {'number': version}}
+
+
+def handler(call: Call):
+    if call.path == '/wiki/api/v2/pages':
+        return 200, {'results': [page_body(page_id) for page_id in call.query['id'].split(',') if page_id in PAGES]}
+    page_id = call.path.rsplit('/', 1)[1]
+    return (200, page_body(page_id)) if page_id in PAGES else (404, {})
+
+
+@pytest.fixture
+def store(tmp_path) -> JsonStateStore:
+    return JsonStateStore(str(tmp_path / "confluence_pages.json"), timedelta(days=30))
+
+
+def new_run(store: JsonStateStore, page_ttl=timedelta(hours=24), missing_page_ttl=timedelta(hours=6)):
+    """
+    A client as in a new run: cold run caches, the page store kept from the previous runs.
+    """
+    session, server = fake_session(handler)
+    return JiraClient('jira.test', 'token', session, store, page_ttl, missing_page_ttl), server
+
+
+def test_page_is_fetched_once_per_run_and_kept_for_the_next(store):
+    client, server = new_run(store)
+    assert client.get_confluence_page('1').title == 'Release 1.2.3'
+    assert client.get_confluence_page('1').title == 'Release 1.2.3'
+    assert len(server.calls) == 1
+
+    client, server = new_run(store)
+    assert client.get_confluence_page('1').version == 3
+    assert server.calls == []
+    assert client.page_store_stats.hits == 1
+
+
+def test_page_past_its_ttl_is_fetched_again(store):
+    new_run(store)[0].get_confluence_page('1')
+
+    client, server = new_run(store, page_ttl=timedelta(0))
+    client.get_confluence_page('1')
+    assert server.paths() == ['/wiki/api/v2/pages/1']
+
+
+def test_missing_page_is_kept_with_its_own_ttl(store):
+    client, server = new_run(store)
+    assert client.get_confluence_page('404') is None
+
+    client, server = new_run(store)
+    assert client.get_confluence_page('404') is None
+    assert server.calls == []
+
+    client, server = new_run(store, missing_page_ttl=timedelta(0))
+    client.get_confluence_page('404')
+    assert server.paths() == ['/wiki/api/v2/pages/404']
+
+
+def test_pages_are_listed_in_bulk(store):
+    client, server = new_run(store)
+    pages = client.get_confluence_pages(['1', '2', '404', '1'])
+
+    assert {page_id: page and page.title for page_id, page in pages.items()} == \
+           {'1': 'Release 1.2.3', '2': 'Release 1.2.4', '404': None}
+    assert server.paths() == ['/wiki/api/v2/pages']
+
+    client.get_confluence_page('404')
+    assert len(server.calls) == 1
+
+
+def test_listed_version_revalidates_a_stored_page_past_its_ttl(store, monkeypatch):
+    new_run(store)[0].get_confluence_pages(['1', '2'])
+    monkeypatch.setitem(PAGES, '2', ('Release 1.2.5', 2))
+
+    client, server = new_run(store, page_ttl=timedelta(0))
+    pages = client.get_confluence_pages(['1', '2'])
+
+    assert server.paths() == ['/wiki/api/v2/pages']
+    assert client.page_store_stats.hits == 1  # page 1, same version
+    assert client.page_store_stats.misses == 1  # page 2, edited
+    assert pages['2'].title == 'Release 1.2.5'
+    assert store.get('2')['page']['version'] == {'number': 2}
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from script.executor import TicketOutcome, first_match, grouped_map, ordered_map, process_tickets
+
+
+def slow_square(item: int) -> int:
+    ## Later items finish first
+    time.sleep((5 - item) * 0.01)
+    return item * item
+
+
+def test_ordered_map_yields_in_input_order():
+    assert list(ordered_map(slow_square, range(5), workers=4)) == [0, 1, 4, 9, 16]
+
+
+def test_ordered_map_bounds_the_calls_in_flight():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def track(item: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return item
+
+    assert list(ordered_map(track, range(20), workers=3)) == list(range(20))
+    assert 1 < peak <= 3
+
+
+def test_ordered_map_consumes_items_lazily():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = ordered_map(lambda item: item, items(), workers=2)
+    assert next(results) == 0
+    assert len(consumed) <= 4
+    results.close()
+
+
+def test_grouped_map_emits_the_logs_of_each_call_as_one_block(caplog):
+    def log_twice(item: int) -> int:
+        logging.info(f"start {item}")
+        time.sleep((5 - item) * 0.01)
+        logging.info(f"end {item}")
+        return item
+
+    with caplog.at_level(logging.INFO):
+        assert list(grouped_map(log_twice, range(5), workers=5)) == list(range(5))
+
+    assert caplog.messages == [f"{step} {i}" for i in range(5) for step in ('start', 'end')]
+
+
+def test_tickets_are_sorted_into_bad_error_and_deferred():
+    outcomes = {
+        'ABC-1': TicketOutcome(),
+        'ABC-2': TicketOutcome(bad='ABC-2'),
+        'ABC-3': TicketOutcome(error='ABC-3'),
+        'ABC-4': TicketOutcome(deferred='ABC-4'),
+        'ABC-5': TicketOutcome(bad='ABC-5'),
+    }
+
+    assert process_tickets(outcomes, outcomes.get, workers=3) == (['ABC-2', 'ABC-5'], ['ABC-3'], ['ABC-4'])
+
+
+def test_exception_of_a_ticket_is_raised_to_the_check():
+    def process(ticket: str) -> TicketOutcome:
+        raise ValueError(ticket)
+
+    with pytest.raises(ValueError):
+        process_tickets(['ABC-1'], process, workers=2)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def test_first_match_returns_the_first_match_in_input_order(executor):
+    def match_even(item: int) -> int:
+        time.sleep((5 - item) * 0.01)
+        return item if item and item % 2 == 0 else 0
+
+    assert first_match(match_even, range(1, 5), executor) == 2
+    assert first_match(match_even, [1, 3], executor) is None
+
+
+def test_first_match_stops_at_the_match_without_an_executor():
+    called = []
+
+    def match_two(item: int) -> bool:
+        called.append(item)
+        return item == 2
+
+    assert first_match(match_two, range(5)) is True
+    assert called == [0, 1, 2]
+
+
+def test_first_match_runs_cheap_items_inline(executor):
+    threads = {}
+
+    def record(item: str) -> bool:
+        threads[item] = threading.current_thread()
+        return False
+
+    first_match(record, ['cached', 'slow1', 'slow2'], executor, is_cheap=lambda item: item == 'cached')
+
+    assert threads['cached'] is threading.current_thread()
+    assert threads['slow1'] is not threading.current_thread()
+
+
+def test_first_match_replays_logs_up_to_the_match(executor, caplog):
+    def log_and_match(item: int) -> bool:
+        logging.info(f"page {item}")
+        time.sleep((5 - item) * 0.01)
+        return item == 1
+
+    with caplog.at_level(logging.INFO):
+        assert first_match(log_and_match, range(4), executor)
+
+    assert caplog.messages == ['page 0', 'page 1']
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from cache import RunCache
+from exception.exceptionmodel import RateLimitDeferredException
+from fakes import Call, fake_session
+from github.githubclient import GitHubClient
+from jira.dev_summary_panel_model import DevSummaryPanelResponse
+from jira.jiramodel import Issue
+from script import check_github
+
+RESERVE = check_github.GITHUB_RATE_LIMIT_RESERVE
+
+
+def rate_limit(remaining: int, resource: str = 'core') -> dict[str, str]:
+    return {'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Resource': resource,
+            'X-RateLimit-Reset': str(int(time.time()) + 3600)}
+
+
+def pr_body(number: int) -> dict:
+    return {'number': number, 'state': 'open', 'merged_at': None, 'title': f'ABC-{number}', 'head': {'ref': 'f'}}
+
+
+def make_ticket(key: str, updated: str, labels=()) -> Issue:
+    return Issue.from_dict({'id': key, 'key': key, 'fields': {'labels': list(labels), 'updated': updated}})
+
+
+@pytest.fixture
+def github(monkeypatch):
+    """
+    A GitHub client on a fake server answering with `github.headers`, swapped into the GitHub check.
+    """
+
+    class Server:
+        headers = rate_limit(4000)
+        graphql_headers = rate_limit(4000, 'graphql')
+
+    def handler(call: Call):
+        if call.path == '/graphql':
+            data = {f'pr{i}': {'pullRequest': {'number': call.json['variables'][f'number{i}'], 'state': 'OPEN',
+                                               'mergedAt': None, 'title': 't', 'headRefName': 'f'}}
+                    for i in range(len(call.json['variables']) // 3)}
+            return 200, {'data': data}, Server.graphql_headers
+        return 200, pr_body(int(call.path.rsplit('/', 1)[1])), Server.headers
+
+    session, server = fake_session(handler)
+    Server.server = server
+    client = GitHubClient('token', session)
+    monkeypatch.setattr(check_github, 'github_client', client)
+    monkeypatch.setattr(check_github, 'dev_summary_cache', RunCache("Development information"))
+    monkeypatch.setattr(check_github, 'pull_request_cache', RunCache("GitHub PR"))
+    return Server
+
+
+def test_pr_lookup_is_deferred_once_the_budget_is_down_to_the_reserve(github):
+    github.headers = rate_limit(RESERVE)
+
+    check_github.fetch_pr_within_budget('o', 'r', 1)
+    with pytest.raises(RateLimitDeferredException):
+        check_github.fetch_pr_within_budget('o', 'r', 2)
+
+    assert github.server.paths() == ['/repos/o/r/pulls/1']
+
+
+def test_pr_lookup_is_deferred_when_exhausted_in_the_meantime(github, monkeypatch):
+    session, server = fake_session(lambda call: (403, {'message': 'API rate limit exceeded'}, rate_limit(0)))
+    monkeypatch.setattr(check_github.github_client, 'session', session)
+
+    with pytest.raises(RateLimitDeferredException):
+        check_github.fetch_pr_within_budget('o', 'r', 1)
+
+
+def test_lookup_priority_puts_recent_tickets_first_and_whitelisted_last():
+    tickets = [
+        make_ticket('ABC-1', '2026-10-10T10:00:00.000+0000'),
+        make_ticket('ABC-2', '2026-10-16T10:00:00.000+0000', labels=[check_github.whitelisted_label]),
+        make_ticket('ABC-3', '2026-10-15T10:00:00.000+0000'),
+        make_ticket('ABC-4', None),
+    ]
+
+    assert [ticket.key for ticket in sorted(tickets, key=check_github.lookup_priority)] == \
+           ['ABC-3', 'ABC-1', 'ABC-4', 'ABC-2']
+
+
+def test_batched_pr_resolution_spends_the_budget_on_recent_tickets_first(github, monkeypatch):
+    monkeypatch.setattr(check_github, 'GITHUB_GRAPHQL_BATCH_SIZE', 1)
+    github.graphql_headers = rate_limit(RESERVE, 'graphql')
+    tickets = [
+        make_ticket('ABC-1', '2026-10-10T10:00:00.000+0000'),
+        make_ticket('ABC-2', '2026-10-16T10:00:00.000+0000'),
+    ]
+    for number, ticket in enumerate(tickets, start=1):
+        check_github.dev_summary_cache.put(ticket.id, DevSummaryPanelResponse.from_dict({'data': {
+            'developmentInformation': {'details': {'instanceTypes': [{'type': 'GitHub', 'danglingPullRequests': [
+                {'url': f'https://github.com/o/r/pull/{number}', 'status': 'OPEN'}]}]}}}}))
+
+    processed = [ticket.key for ticket in check_github.with_pull_requests_resolved(tickets)]
+
+    assert processed == ['ABC-2', 'ABC-1']
+    assert [call.json['variables'] for call in github.server.calls] == [{'owner0': 'o', 'repo0': 'r', 'number0': 2}]
+    assert check_github.pull_request_cache.get(('o', 'r', 2))
+    assert not check_github.pull_request_cache.get(('o', 'r', 1))
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+
+from cache import JsonStateStore
+
+from fakes import Call, fake_session
+from github.githubclient import GitHubClient
+
+PRS = {
+    1: {'number': 1, 'state': 'OPEN', 'mergedAt': None, 'title': 'ABC-1 Open', 'headRefName': 'feature/ABC-1'},
+    2: {'number': 2, 'state': 'MERGED', 'mergedAt': '2026-10-16T10:00:00Z', 'title': 'ABC-2 Merged',
+        'headRefName': 'feature/ABC-2'},
+}
+
+
+def graphql_reply(variables: dict) -> dict:
+    data = {}
+    errors = []
+    for i in range(len(variables) // 3):
+        pr = PRS.get(variables[f'number{i}'])
+        data[f'pr{i}'] = {'pullRequest': pr}
+        if pr is None:
+            errors.append({'message': 'Could not resolve to a PullRequest', 'path': [f'pr{i}', 'pullRequest']})
+    return {'data': data, 'errors': errors}
+
+
+def rest_reply(call: Call):
+    """
+    The PR with its revision as ETag, `304 Not Modified` if the client already has that revision.
+    """
+    pr = PRS[int(call.path.rsplit('/', 1)[1])]
+    etag = f'"{pr["title"]}"'
+    if call.headers.get('If-None-Match') == etag:
+        return 304, None, {'ETag': etag}
+    body = {'number': pr['number'], 'state': 'open' if pr['state'] == 'OPEN' else 'closed', 'merged_at': pr['mergedAt'], 'title': pr['title'],
+            'head': {'ref': pr['headRefName']}}
+    return 200, body, {'ETag': etag, 'Last-Modified': 'Fri, 16 Oct 2026 10:00:00 GMT'}
+
+
+def handler(call: Call):
+    if call.path == '/graphql':
+        return 200, graphql_reply(call.json['variables'])
+    return rest_reply(call)
+
+
+@pytest.fixture
+def github():
+    session, server = fake_session(handler)
+    return GitHubClient('token', session), server
+
+
+@pytest.fixture
+def etag_store(tmp_path) -> JsonStateStore:
+    return JsonStateStore(str(tmp_path / "github_etags.json"), timedelta(days=30))
+
+
+def new_run(etag_store: JsonStateStore):
+    session, server = fake_session(handler)
+    return GitHubClient('token', session, etag_store), server
+
+
+def test_pr_states_are_fetched_in_aliased_batches(github):
+    client, server = github
+
+    prs = client.fetch_prs([('o', 'r', 1), ('o', 'r', '2'), ('o', 'r', 1)], batch_size=1)
+
+    assert [call.json['variables'] for call in server.calls] == \
+           [{'owner0': 'o', 'repo0': 'r', 'number0': 1}, {'owner0': 'o', 'repo0': 'r', 'number0': 2}]
+    assert prs[('o', 'r', 1)].state == 'open'
+    assert (prs[('o', 'r', 2)].state, prs[('o', 'r', 2)].merged_at) == ('closed', '2026-10-16T10:00:00Z')
+    assert prs[('o', 'r', 2)].head.ref == 'feature/ABC-2'
+
+
+def test_pr_which_failed_to_resolve_is_left_out(github, caplog):
+    client, server = github
+
+    prs = client.fetch_prs([('o', 'r', 1), ('o', 'r', 404)])
+
+    assert list(prs) == [('o', 'r', 1)]
+    assert len(server.calls) == 1
+    assert "Failed to fetch GitHub PR ('o', 'r', 404): Could not resolve to a PullRequest" in caplog.text
+
+
+
+def test_stored_pr_is_revalidated_and_replayed_on_not_modified(etag_store):
+    client, server = new_run(etag_store)
+    assert not client.can_revalidate_pr('o', 'r', 1)
+    client.fetch_pr('o', 'r', 1)
+    assert client.can_revalidate_pr('o', 'r', 1)
+
+    client, server = new_run(etag_store)
+    pr = client.fetch_pr('o', 'r', 1)
+
+    assert server.calls[0].headers['If-None-Match'] == '"ABC-1 Open"'
+    assert server.calls[0].headers['If-Modified-Since'] == 'Fri, 16 Oct 2026 10:00:00 GMT'
+    assert (pr.number, pr.state, pr.title, pr.head.ref) == (1, 'open', 'ABC-1 Open', 'feature/ABC-1')
+    assert (client.etag_stats.hits, client.etag_stats.misses) == (1, 0)
+
+
+def test_changed_pr_is_fetched_and_stored_again(etag_store, monkeypatch):
+    new_run(etag_store)[0].fetch_pr('o', 'r', 1)
+    monkeypatch.setitem(PRS, 1, {**PRS[1], 'state': 'MERGED', 'title': 'ABC-1 Merged'})
+
+    client, server = new_run(etag_store)
+    pr = client.fetch_pr('o', 'r', 1)
+
+    assert (pr.state, pr.title) == ('closed', 'ABC-1 Merged')
+    assert (client.etag_stats.hits, client.etag_stats.misses) == (0, 1)
+    assert etag_store.get('https://api.github.com/repos/o/r/pulls/1')['etag'] == '"ABC-1 Merged"'
+
+
+def test_pr_is_not_revalidated_without_a_store(github):
+    client, server = github
+
+    client.fetch_pr('o', 'r', 1)
+    client.fetch_pr('o', 'r', 1)
+
+    assert 'If-None-Match' not in server.calls[1].headers
+    assert not client.can_revalidate_pr('o', 'r', 1)
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+import requests
+
+from fakes import fake_session
+from network import RetryBudget, RetryPolicy
+from network import pooledsession
+
+URL = 'https://jira.test/rest/api/3/myself'
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    slept = []
+    monkeypatch.setattr(pooledsession.time, 'sleep', slept.append)
+    return slept
+
+
+def replies(*items):
+    """
+    Handler answering with `items` in turn, raising those which are exceptions.
+    """
+    remaining = list(items)
+
+    def handler(call):
+        item = remaining.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    return handler
+
+
+def policy(budget: int = 10, max_retries: int = 3) -> RetryPolicy:
+    return RetryPolicy(RetryBudget(budget), max_retries=max_retries, backoff_base=1, backoff_max=30, max_wait=60)
+
+
+def test_transient_status_is_retried_with_jittered_backoff(sleeps):
+    session, server = fake_session(replies(503, 502, 200), policy())
+
+    assert session.get(URL).status_code == 200
+    assert len(server.calls) == 3
+    assert 0 <= sleeps[0] <= 1 and 0 <= sleeps[1] <= 2
+
+
+def test_retries_stop_after_max_retries(sleeps):
+    session, server = fake_session(replies(503, 503, 503), policy(max_retries=2))
+
+    assert session.get(URL).status_code == 503
+    assert len(server.calls) == 3
+
+
+def test_retry_after_is_honoured(sleeps):
+    session, server = fake_session(replies((429, None, {'Retry-After': '7'}), 200), policy())
+
+    assert session.get(URL).status_code == 200
+    assert 7 <= sleeps[0] <= 8
+
+
+def test_retry_after_as_http_date_is_honoured(sleeps):
+    retry_at = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 20))
+    session, server = fake_session(replies((503, None, {'Retry-After': retry_at}), 200), policy())
+
+    assert session.get(URL).status_code == 200
+    assert 18 <= sleeps[0] <= 21
+
+
+def test_retry_after_beyond_the_max_wait_is_not_waited_for(sleeps):
+    session, server = fake_session(replies((429, None, {'Retry-After': '3600'})), policy())
+
+    assert session.get(URL).status_code == 429
+    assert sleeps == []
+
+
+def test_exhausted_github_quota_waits_for_the_reset(sleeps):
+    reset = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) + 10)}
+    session, server = fake_session(replies((403, None, reset), 200), policy())
+
+    assert session.get(URL).status_code == 200
+    assert 8 <= sleeps[0] <= 11
+
+
+def test_forbidden_with_quota_left_is_not_retried(sleeps):
+    session, server = fake_session(replies((403, None, {'X-RateLimit-Remaining': '10'})), policy())
+
+    assert session.get(URL).status_code == 403
+    assert len(server.calls) == 1
+
+
+def test_failed_write_is_only_retried_when_rate_limited(sleeps):
+    session, server = fake_session(replies(503), policy())
+    assert session.post(URL, json={}).status_code == 503
+
+    session, server = fake_session(replies(429, 201), policy())
+    assert session.post(URL, json={}).status_code == 201
+
+
+def test_read_only_post_is_retried_as_a_read(sleeps):
+    session, server = fake_session(replies(503, 200), policy())
+
+    assert session.post(URL, json={}, idempotent=True).status_code == 200
+
+
+def test_connection_errors_are_retried_for_reads_and_unsent_writes(sleeps):
+    session, server = fake_session(replies(requests.exceptions.ConnectionError(), 200), policy())
+    assert session.get(URL).status_code == 200
+
+    session, server = fake_session(replies(requests.exceptions.ConnectTimeout(), 201), policy())
+    assert session.post(URL, json={}).status_code == 201
+
+    session, server = fake_session(replies(requests.exceptions.ReadTimeout()), policy())
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.post(URL, json={})
+
+
+def test_run_budget_is_shared_and_bounds_the_retries(sleeps):
+    retry_policy = policy(budget=1)
+    session, server = fake_session(replies(503, 503, 503), retry_policy)
+
+    assert session.get(URL).status_code == 503
+    assert len(server.calls) == 2
+    assert retry_policy.budget.used == 1
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import RunCache
+
+
+def test_value_is_loaded_once_and_then_served():
+    cache = RunCache("Issue")
+
+    assert cache.get_or_load('ABC-1', lambda: 'loaded') == 'loaded'
+    assert cache.get_or_load('ABC-1', lambda: 'loaded again') == 'loaded'
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = RunCache("Issue")
+    release = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        release.wait(5)
+        return 'loaded'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_or_load, 'ABC-1', loader) for _ in range(4)]
+        while cache.stats.misses + cache.stats.coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ['loaded'] * 4
+    assert len(loads) == 1
+    assert (cache.stats.misses, cache.stats.coalesced) == (1, 3)
+
+
+def test_failed_load_is_raised_and_not_cached():
+    cache = RunCache("Issue")
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load('ABC-1', fail)
+
+    assert 'ABC-1' not in cache
+    assert cache.get_or_load('ABC-1', lambda: 'loaded') == 'loaded'
+
+
+def test_invalid_cached_value_is_loaded_again():
+    cache = RunCache("Issue")
+    cache.put('ABC-1', {'fields': ['summary']})
+
+    value = cache.get_or_load('ABC-1', lambda: {'fields': ['summary', 'labels']},
+                              is_valid=lambda cached: 'labels' in cached['fields'])
+
+    assert value == {'fields': ['summary', 'labels']}
+    assert cache.get('ABC-1') == value
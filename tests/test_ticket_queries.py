@@ -0,0 +1,72 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from constants import SPRINT_FIELD
+from jira.jiramodel import Issue
+from jql import matches_jql
+from script import deployment_note_query, github_query, linked_dependency_query
+from script.snapshot import TicketSnapshot
+
+NOW = datetime(2026, 10, 17, 8, 39, 27, tzinfo=timezone.utc)
+
+STATUSES = ['Done', 'accepted', 'Backlog', 'NEW', 'In Progress', None]
+KEYS = ['ABC-1', 'abc-2', 'XYZ-3', 'ABCD-4']
+LABELS = [[], ['DeploymentNote'], ['Other'], ['Other', 'DeploymentNote']]
+SPRINTS = [None, [], [{'name': 'Sprint 1', 'state': 'active', 'startDate': '2026-10-12T00:00:00.000Z'}]]
+LINKS = [[], [{'id': '1', 'type': {'name': 'Blocks', 'inward': 'is blocked by', 'outward': 'blocks'},
+               'outwardIssue': {'key': 'ABC-9'}}]]
+AGES = [timedelta(minutes=1), timedelta(hours=23, minutes=59), timedelta(days=1), timedelta(days=1, seconds=1),
+        timedelta(days=4, hours=23, minutes=59, seconds=59), timedelta(days=5), timedelta(days=5, seconds=1), None]
+
+
+def make_ticket(key: str, status, labels, sprint, links, age) -> Issue:
+    fields = {
+        'status': {'name': status, 'id': '1'} if status else None,
+        'labels': labels,
+        'issuelinks': links,
+        SPRINT_FIELD: sprint,
+        'summary': 'Ticket',
+    }
+    if age is not None:
+        fields['updated'] = (NOW.replace(second=0) - age).strftime('%Y-%m-%dT%H:%M:%S.000%z')
+    return Issue.from_dict({'id': key, 'key': key, 'fields': fields})
+
+
+def all_tickets() -> list[Issue]:
+    return [
+        make_ticket(*combination)
+        for combination in itertools.product(KEYS, STATUSES, LABELS, SPRINTS, LINKS, AGES)
+    ]
+
+
+@pytest.mark.parametrize('ticket_query', [deployment_note_query, linked_dependency_query, github_query])
+def test_snapshot_selection_agrees_with_the_check_jql(ticket_query):
+    query = ticket_query()
+    query.params = query.params.anchored(NOW)
+    jql = query.params.to_jql()
+
+    for ticket in all_tickets():
+        assert query.matches(ticket, NOW) == matches_jql(jql, ticket, NOW, timezone.utc), (jql, ticket)
+
+
+@pytest.mark.parametrize('ticket_query', [deployment_note_query, linked_dependency_query, github_query])
+def test_each_check_selects_some_tickets(ticket_query):
+    query = ticket_query()
+    query.params = query.params.anchored(NOW)
+
+    assert any(query.matches(ticket, NOW) for ticket in all_tickets())
+
+
+def test_snapshot_selects_per_check_from_the_union():
+    queries = [query() for query in (deployment_note_query, linked_dependency_query, github_query)]
+    queries = {query.check_name: query for query in queries}
+    for query in queries.values():
+        query.params = query.params.anchored(NOW)
+    tickets = all_tickets()
+    snapshot = TicketSnapshot(queries, tickets, NOW.timestamp())
+
+    for check_name, query in queries.items():
+        expected = [ticket.key for ticket in tickets if matches_jql(query.params.to_jql(), ticket, NOW, timezone.utc)]
+        assert [ticket.key for ticket in snapshot.select(check_name)] == expected
@@ -0,0 +1,169 @@
+import logging
+from datetime import timedelta
+
+import pytest
+import requests
+
+from cache import JsonStateStore, RunCache
+from exception.exceptionmodel import TransitionNotFoundException
+from fakes import Call, fake_session
+from jira import jira_client
+from jira.jiramodel import Issue
+from script import utils
+
+
+def make_ticket(key: str, issue_type_id='10001', status_id='3') -> Issue:
+    return Issue.from_dict({'id': key, 'key': key, 'fields': {
+        'status': {'name': 'Done', 'id': status_id},
+        'issuetype': {'id': issue_type_id} if issue_type_id else {'name': 'Story'},
+    }})
+
+
+def transitions(*targets: tuple[str, str]) -> dict:
+    return {'transitions': [{'id': transition_id, 'name': name, 'to': {'name': name}} for transition_id, name in targets]}
+
+
+@pytest.fixture
+def jira(monkeypatch):
+    """
+    Serve the transitions of every ticket by `jira.transitions`, and accept transitions not in `jira.rejected`.
+    """
+
+    class Server:
+        transitions = transitions(('41', 'Rework'), ('51', 'In Progress'))
+        rejected: set[str] = set()
+
+    def handler(call: Call):
+        if call.method == 'GET' and call.path.endswith('/transitions'):
+            return 200, Server.transitions
+        if call.method == 'POST' and call.path.endswith('/transitions'):
+            return 400 if call.json['transition']['id'] in Server.rejected else 204
+        raise AssertionError(call)
+
+    session, server = fake_session(handler)
+    Server.server = server
+    monkeypatch.setattr(jira_client, 'session', session)
+    monkeypatch.setattr(jira_client, 'transitions_cache', RunCache("Transitions"))
+    monkeypatch.setattr(utils, 'transitioned_ticket_keys', set())
+    return Server
+
+
+def test_tickets_in_the_same_workflow_state_share_the_transitions(jira):
+    utils.perform_transition(make_ticket('ABC-1'), 'In Progress')
+    utils.perform_transition(make_ticket('ABC-2'), 'In Progress')
+    utils.perform_transition(make_ticket('ABC-3', status_id='4'), 'In Progress')
+
+    assert jira.server.paths('GET') == ['/rest/api/3/issue/ABC-1/transitions', '/rest/api/3/issue/ABC-3/transitions']
+    assert utils.transitioned_ticket_keys == {'ABC-1', 'ABC-2', 'ABC-3'}
+
+
+def test_tickets_without_a_workflow_state_fetch_their_own(jira):
+    utils.perform_transition(make_ticket('ABC-1', issue_type_id=None), 'In Progress')
+    utils.perform_transition(make_ticket('ABC-2', issue_type_id=None), 'In Progress')
+
+    assert len(jira.server.paths('GET')) == 2
+
+
+def test_target_missing_from_the_cached_transitions_is_a_plain_miss(jira, caplog):
+    utils.perform_transition(make_ticket('ABC-1'), 'In Progress')
+
+    with pytest.raises(TransitionNotFoundException):
+        utils.perform_transition(make_ticket('ABC-2'), 'Reopen (CAT)')
+    assert len(jira.server.paths('GET')) == 1
+
+    with caplog.at_level(logging.INFO):
+        utils.perform_one_of_transitions(make_ticket('ABC-3'), ['Reopen (CAT)', 'In Progress'])
+    assert len(jira.server.paths('GET')) == 1
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+    assert 'ABC-3' in utils.transitioned_ticket_keys
+
+
+def test_rejected_cached_transition_is_fetched_again_for_the_ticket(jira):
+    utils.perform_transition(make_ticket('ABC-1'), 'In Progress')
+    jira.rejected = {'51'}
+    jira.transitions = transitions(('52', 'In Progress'))
+
+    utils.perform_transition(make_ticket('ABC-2'), 'In Progress')
+
+    posted = [call.json['transition']['id'] for call in jira.server.calls if call.method == 'POST']
+    assert posted == ['51', '51', '52']
+    assert jira.server.paths('GET')[-1] == '/rest/api/3/issue/ABC-2/transitions'
+
+
+def test_rejected_live_transition_is_not_fetched_again(jira):
+    jira.rejected = {'51'}
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        utils.perform_transition(make_ticket('ABC-1', issue_type_id=None), 'In Progress')
+    assert len(jira.server.paths('GET')) == 1
+
+
+#### transition screen ####
+
+@pytest.fixture
+def screens(monkeypatch, tmp_path):
+    store = JsonStateStore(str(tmp_path / "transition_screens.json"), timedelta(days=30))
+    monkeypatch.setattr(utils, '_transition_screen_store', store)
+    return store
+
+
+def reason_not_on_screen(message="Field 'customfield_13259' cannot be set. It is not on the appropriate screen, or unknown."):
+    def reject(jira, call: Call):
+        fields = call.json.get('fields') or {}
+        if utils.reopen_or_rework_reason_field_id in fields:
+            return 400, {'errorMessages': [], 'errors': {utils.reopen_or_rework_reason_field_id: message}}
+        return 204
+    return reject
+
+
+def serve_rework(jira, monkeypatch, on_post):
+    def handler(call: Call):
+        if call.method == 'GET':
+            return 200, transitions(('41', 'Rework'))
+        if call.method == 'PUT':
+            return 204
+        return on_post(jira, call)
+
+    session, server = fake_session(handler)
+    monkeypatch.setattr(jira_client, 'session', session)
+    return server
+
+
+def test_reason_not_on_screen_is_learnt_from_the_errors_in_any_language(jira, screens, monkeypatch):
+    server = serve_rework(jira, monkeypatch, reason_not_on_screen("Le champ ne peut pas être défini."))
+
+    utils.perform_transition(make_ticket('ABC-1'), 'Rework')
+    utils.perform_transition(make_ticket('ABC-2'), 'Rework')
+
+    assert [call.method for call in server.calls] == ['GET', 'POST', 'PUT', 'POST', 'PUT', 'POST']
+    assert utils.get_reason_on_screen('ABC/10001/41') is False
+
+
+def test_other_rejections_are_not_taken_for_the_screen(jira, screens, monkeypatch):
+    server = serve_rework(jira, monkeypatch, lambda jira, call: (400, {'errors': {'resolution': 'Required'}}))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        utils.perform_transition(make_ticket('ABC-1', status_id='5'), 'Rework')
+
+    assert [call.method for call in server.calls if call.method != 'GET'] == ['POST']
+    assert utils.get_reason_on_screen('ABC/10001/41') is None
+
+
+def test_reason_on_screen_is_learnt_and_expires(jira, screens, monkeypatch):
+    serve_rework(jira, monkeypatch, lambda jira, call: 204)
+
+    utils.perform_transition(make_ticket('ABC-1'), 'Rework')
+    assert utils.get_reason_on_screen('ABC/10001/41') is True
+
+    monkeypatch.setattr(utils, 'transition_screen_ttl', timedelta(0))
+    assert utils.get_reason_on_screen('ABC/10001/41') is None
+
+
+def test_screen_is_not_learnt_without_the_issue_type(jira, screens, monkeypatch):
+    server = serve_rework(jira, monkeypatch, reason_not_on_screen())
+
+    utils.perform_transition(make_ticket('ABC-1', issue_type_id=None), 'Rework')
+    utils.perform_transition(make_ticket('ABC-2', issue_type_id=None), 'Rework')
+
+    assert [call.method for call in server.calls] == ['GET', 'POST', 'PUT', 'POST'] * 2
+    assert len(screens) == 0
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from jira.jiramodel import Issue, UpdatedWindow
+from jql import matches_jql
+
+NOW = datetime(2026, 10, 17, 8, 39, 27, tzinfo=timezone.utc)
+ANCHOR = NOW.replace(second=0, microsecond=0)
+
+
+def ticket_updated_at(updated: datetime) -> Issue:
+    return Issue.from_dict({'key': 'ABC-1', 'fields': {'updated': updated.strftime('%Y-%m-%dT%H:%M:%S.%f%z')}})
+
+
+def offsets_around(*bounds: timedelta) -> list[timedelta]:
+    """
+    Ages just inside, on and just outside each bound, at second and minute precision
+    """
+    deltas = (timedelta(0), timedelta(seconds=1), timedelta(seconds=59), timedelta(minutes=1))
+    return [bound + delta for bound in bounds for delta in deltas] + [bound - delta for bound in bounds for delta in deltas]
+
+
+#### anchored ####
+
+def test_anchored_floors_to_the_minute_and_keeps_its_anchor():
+    window = UpdatedWindow(since=timedelta(days=5)).anchored(NOW)
+
+    assert window.now == ANCHOR
+    assert window.anchored(NOW + timedelta(hours=1)).now == ANCHOR
+
+
+def test_to_jql_relative_and_absolute():
+    window = UpdatedWindow(since=timedelta(days=5), until=timedelta(hours=12))
+
+    assert window.to_jql() == 'updated >= -5d and updated < -12h'
+    assert window.anchored(NOW).to_jql() == 'updated >= "2026/10/12 08:39" and updated < "2026/10/16 20:39"'
+
+
+def test_to_jql_open_ended_without_until():
+    window = UpdatedWindow(since=timedelta(minutes=90))
+
+    assert window.to_jql() == 'updated >= -90m'
+    assert window.anchored(NOW).to_jql() == 'updated >= "2026/10/17 07:09"'
+
+
+#### contains ####
+
+@pytest.mark.parametrize('until', [timedelta(0), timedelta(days=1)])
+def test_contains_agrees_with_anchored_jql(until: timedelta):
+    window = UpdatedWindow(since=timedelta(days=5), until=until).anchored(NOW)
+
+    for age in offsets_around(window.since, window.until) + [-timedelta(days=1)]:
+        ticket = ticket_updated_at(ANCHOR - age)
+        assert window.contains(ticket.updated_at(), NOW) == matches_jql(window.to_jql(), ticket, NOW, timezone.utc), age
+
+
+@pytest.mark.parametrize('until', [timedelta(0), timedelta(days=1)])
+def test_contains_agrees_with_relative_jql(until: timedelta):
+    window = UpdatedWindow(since=timedelta(days=5), until=until)
+
+    for age in offsets_around(window.since, window.until):
+        ticket = ticket_updated_at(NOW - age)
+        assert window.contains(ticket.updated_at(), NOW) == matches_jql(window.to_jql(), ticket, NOW, timezone.utc), age
+
+
+def test_contains_edges():
+    window = UpdatedWindow(since=timedelta(days=5), until=timedelta(days=1)).anchored(NOW)
+
+    assert window.contains(ANCHOR - timedelta(days=5), NOW)  # since is inclusive
+    assert not window.contains(ANCHOR - timedelta(days=5, seconds=1), NOW)
+    assert not window.contains(ANCHOR - timedelta(days=1), NOW)  # until is exclusive
+    assert window.contains(ANCHOR - timedelta(days=1, seconds=1), NOW)
+    assert not window.contains(None, NOW)
+
+
+def test_contains_without_until_is_open_ended():
+    window = UpdatedWindow(since=timedelta(days=5)).anchored(NOW)
+
+    assert window.contains(NOW, NOW)
+    assert window.contains(NOW + timedelta(days=1), NOW)  # clock skew of the server
+
+
+def test_contains_reads_the_anchor_rather_than_now():
+    window = UpdatedWindow(since=timedelta(days=5)).anchored(NOW)
+
+    assert window.contains(ANCHOR - timedelta(days=5), NOW + timedelta(hours=1))
+
+
+def test_contains_compares_across_time_zones():
+    window = UpdatedWindow(since=timedelta(days=5)).anchored(NOW.astimezone(timezone(timedelta(hours=8))))
+    updated = (ANCHOR - timedelta(days=5)).astimezone(timezone(timedelta(hours=-5)))
+
+    assert window.contains(updated, NOW)
+    assert not window.contains(updated - timedelta(seconds=1), NOW)
+
+
+#### split ####
+
+@pytest.mark.parametrize('slices', [2, 3, 7])
+def test_split_is_contiguous_and_covers_the_window(slices: int):
+    window = UpdatedWindow(since=timedelta(days=5), until=timedelta(days=1)).anchored(NOW)
+    parts = window.split(slices)
+
+    assert len(parts) == slices
+    assert parts[0].since == window.since
+    assert parts[-1].until == window.until
+    for older, newer in zip(parts, parts[1:]):
+        assert older.until == newer.since
+        assert older.since > older.until
+    assert all(part.now == window.now for part in parts)
+
+
+@pytest.mark.parametrize('until', [timedelta(0), timedelta(days=1)])
+def test_split_jql_bounds_leave_no_gap(until: timedelta):
+    window = UpdatedWindow(since=timedelta(days=5), until=until).anchored(NOW)
+    parts = window.split(3)
+
+    for older, newer in zip(parts, parts[1:]):
+        assert older.to_jql().split(' and ')[1] == newer.to_jql().split(' and ')[0].replace('>=', '<')
+
+
+def test_split_puts_each_ticket_in_exactly_one_slice():
+    window = UpdatedWindow(since=timedelta(days=5), until=timedelta(days=1)).anchored(NOW)
+    parts = window.split(3)
+    bounds = [part.since for part in parts] + [window.until]
+
+    for age in offsets_around(*bounds):
+        updated = ANCHOR - age
+        in_parts = [part for part in parts if part.contains(updated, NOW)]
+        assert len(in_parts) == (1 if window.contains(updated, NOW) else 0), age
+
+
+def test_split_into_one_returns_the_window():
+    window = UpdatedWindow(since=timedelta(days=5))
+
+    assert window.split(1) == [window]
+
+
+def test_split_caps_slices_to_whole_minutes():
+    window = UpdatedWindow(since=timedelta(minutes=3), until=timedelta(minutes=1))
+
+    assert [(part.since, part.until) for part in window.split(10)] == [
+        (timedelta(minutes=3), timedelta(minutes=2)),
+        (timedelta(minutes=2), timedelta(minutes=1)),
+    ]
@@ -0,0 +1,72 @@
+from jira import jira_client
+from jira.jiramodel import Issue
+from script.check_linked_dependency import linked_ticket_sprints, sprint_field
+from script.verdicts import fingerprint
+
+
+def make_ticket(**fields) -> Issue:
+    return Issue.from_dict({'id': '1', 'key': 'ABC-1', 'fields': {
+        'status': {'name': 'Done', 'id': '1'},
+        'labels': ['DeploymentNote'],
+        'fixVersions': [{'name': 'Release 1.2.3'}],
+        'updated': '2026-10-16T10:00:00.000+0800',
+        **fields
+    }})
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint(make_ticket()) == fingerprint(make_ticket())
+
+
+def test_fingerprint_ignores_updated_and_field_order():
+    ticket = make_ticket(updated='2026-10-17T10:00:00.000+0800')
+    reordered = Issue.from_dict({'id': '1', 'key': 'ABC-1', 'fields': dict(reversed(list({
+        'status': {'name': 'Done', 'id': '1'},
+        'labels': ['DeploymentNote'],
+        'fixVersions': [{'name': 'Release 1.2.3'}],
+        'updated': '2026-10-16T10:00:00.000+0800',
+    }.items())))})
+
+    assert fingerprint(ticket) == fingerprint(make_ticket())
+    assert fingerprint(reordered) == fingerprint(make_ticket())
+
+
+def test_fingerprint_changes_with_the_fields():
+    base = fingerprint(make_ticket())
+
+    assert fingerprint(make_ticket(labels=['DeploymentNote', 'Other'])) != base
+    assert fingerprint(make_ticket(fixVersions=[{'name': 'Release 1.2.4'}])) != base
+    assert fingerprint(make_ticket(status={'name': 'Accepted', 'id': '2'})) != base
+    assert fingerprint(make_ticket(issuelinks=[{'id': '1'}])) != base
+
+
+def test_fingerprint_changes_with_the_external_state():
+    ticket = make_ticket()
+    open_pr = "https://github.com/o/r/pull/1 OPEN"
+
+    assert fingerprint(ticket) == fingerprint(ticket, "")
+    assert fingerprint(ticket, open_pr) != fingerprint(ticket)
+    assert fingerprint(ticket, open_pr) == fingerprint(ticket, open_pr)
+    assert fingerprint(ticket, "https://github.com/o/r/pull/1 MERGED") != fingerprint(ticket, open_pr)
+
+
+def test_linked_ticket_sprints_needs_every_linked_ticket_resolved():
+    link_type = {'name': 'Gantt End to Start', 'inward': 'has to be done after', 'outward': 'has to be done before'}
+    ticket = make_ticket(issuelinks=[
+        {'id': '1', 'type': link_type, 'outwardIssue': {'key': 'ABC-2'}},
+        {'id': '2', 'type': link_type, 'inwardIssue': {'key': 'ABC-3'}},
+    ])
+
+    def resolve(key: str, start_date: str) -> None:
+        linked = Issue.from_dict({'key': key, 'fields': {sprint_field: [{'name': 'Sprint', 'startDate': start_date}]}})
+        jira_client.issue_cache.put((key, (sprint_field,), ()), linked)
+
+    resolve('ABC-2', '2026-10-12T00:00:00.000Z')
+    assert linked_ticket_sprints(ticket) is None
+
+    resolve('ABC-3', '2026-10-12T00:00:00.000Z')
+    state = linked_ticket_sprints(ticket)
+    assert state is not None
+
+    resolve('ABC-3', '2026-10-26T00:00:00.000Z')
+    assert linked_ticket_sprints(ticket) != state